@@ -1,12 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import List, Dict, Any, Optional, Tuple
 import json
 import asyncio
 import logging
 from datetime import datetime
 from scribe_ai.core.research import ResearchOrchestrator
-from scribe_ai.utils.rate_limiter import RateLimiter
-rate_limiter = RateLimiter(15, 60)  # 5 requests per second
+from scribe_ai.utils.rate_limiter import create_rate_limiter
+from scribe_ai.utils.budget import ResourceBudget, budget_allowance, budget_exhausted, current_budget, use_budget
+from scribe_ai.utils.checkpoint import CheckpointStore
+from scribe_ai.utils.response_cache import ResponseCache
+from scribe_ai.utils.loop_local import LoopLocal
+rate_limiter = create_rate_limiter(15, 60, name="tavily", adaptive=True)  # 5 requests per second
 from pathlib import Path
 import hashlib
 
@@ -29,6 +33,8 @@ class Section:
     description: str
     content: Optional[str] = None
     index: int = 0
+    key_points: Optional[List[str]] = None
+    key_points_hash: Optional[str] = None  # Hash of the content the key points were extracted from
 
 @dataclass
 class ContentPlan:
@@ -126,15 +132,19 @@ class SectionImprovement:
     confidence_score: float  # Added for better scoring
 
 class ContentCreationSystem:
-    def __init__(self, api, research_orchestrator):
+    def __init__(self, api, research_orchestrator, parallel_sections: bool = False, section_concurrency: int = 5):
         self.api = api
         self.research_orchestrator = research_orchestrator
+        # Draft all sections at once from the outline instead of one after another
+        self.parallel_sections = parallel_sections
+        self._section_semaphore = LoopLocal(lambda: asyncio.Semaphore(section_concurrency))
         self.agents = []
         self.improvement_threshold = 0.8
         self.max_iterations = 3  # Increased for better improvements
         self.cache_dir = Path("research_cache")
         self.cache_dir.mkdir(exist_ok=True)
         self.citations = []  # Track all citations
+        self._key_points_cache: Dict[str, List[str]] = {}  # Content hash -> key points
         self._setup_system_instructions()
     def _setup_system_instructions(self):
         """Initialize system instructions for different content creation tasks"""
@@ -259,10 +269,10 @@ class ContentCreationSystem:
         content_plan: ContentPlan,
         context: Dict[str, Any]
     ) -> List[AgentSuggestion]:
-        """Collect improvement suggestions from all agents"""
+        """Collect improvement suggestions from all agents, or the first few when the budget runs low"""
         suggestions = []
 
-        for agent in self.agents:
+        for agent in self.agents[:budget_allowance(len(self.agents))]:
             suggestion_prompt = {
                 "role": "user",
                 "content": f"""As {agent.role} with expertise in {', '.join(agent.expertise)},
@@ -376,12 +386,16 @@ class ContentCreationSystem:
             "sections": [{"title": s.title, "description": s.description} for s in content_plan.sections]
         }
         
-        research_results = await self.research_orchestrator.conduct_research(json.dumps(research_prompt))
+        # A deterministic run id lets a re-run of a failed job resume from its checkpoint
+        run_id = f"content-{CheckpointStore.input_hash(research_prompt)[:16]}"
+        research_results = await self.research_orchestrator.conduct_research(
+            json.dumps(research_prompt), run_id=run_id
+        )
         return research_results
 
     async def _extract_key_points(self, content: str) -> List[str]:
         """Extract key points from section content for context building"""
-        if not content:
+        if not content or budget_exhausted():
             return []
             
         try:
@@ -406,6 +420,25 @@ class ContentCreationSystem:
             logger.error(f"Error extracting key points: {str(e)}")
             return []
 
+    async def _section_key_points(self, section: Section) -> List[str]:
+        """Key points of a section, extracted once per distinct content and reused afterwards"""
+        if not section.content:
+            return []
+        content_hash = hashlib.sha256(section.content.encode("utf-8")).hexdigest()
+        if section.key_points_hash == content_hash:
+            return section.key_points
+
+        key_points = self._key_points_cache.get(content_hash)
+        if key_points is None:
+            key_points = await self._extract_key_points(section.content)
+            if not key_points:
+                # May be a failed extraction, so it is not memoised and is retried next time
+                return key_points
+            self._key_points_cache[content_hash] = key_points
+        section.key_points = key_points
+        section.key_points_hash = content_hash
+        return key_points
+
     async def improve_section_content(
         self,
         section: Section,
@@ -416,6 +449,9 @@ class ContentCreationSystem:
     ) -> str:
         """Improve content based on collected agent suggestions"""
         current_content = content
+        if budget_exhausted():
+            logger.info(f"Resource budget used up, keeping section '{section.title}' as drafted")
+            return current_content
         
         # Collect all agent suggestions first
         suggestions = await self.collect_agent_suggestions(
@@ -445,9 +481,12 @@ class ContentCreationSystem:
                 - Research integration with proper citations
 
                 Expert Suggestions:
-                {json.dumps([{
-                    # Add the rest of the code here
-                }], ensure_ascii=False)}
+                {json.dumps([asdict(suggestion) for suggestion in suggestions], indent=2, ensure_ascii=False)}
+
+                Return a JSON object with:
+                {{
+                    "improved_content": "the full improved section content"
+                }}
                 """
             }
 
@@ -517,7 +556,7 @@ class ContentCreationSystem:
                 {
                     "title": s.title,
                     "content": s.content,
-                    "key_points": await self._extract_key_points(s.content) if s.content else []
+                    "key_points": await self._section_key_points(s)
                 }
                 for s in completed_sections
             ],
@@ -676,8 +715,21 @@ class ContentCreationSystem:
         except Exception as e:
             logger.error(f"Error creating introduction/conclusion: {str(e)}")
             return "", ""
-    async def create_content_with_research(self, topic: str) -> str:
-        """Main method to create researched and improved content"""
+    async def create_content_with_research(self, topic: str, budget: Optional[ResourceBudget] = None) -> str:
+        """Main method to create researched and improved content.
+
+        An optional resource budget applies to the whole run, including the research;
+        without one, the budget of the caller's context, if any, is used."""
+        if budget is not None:
+            budget.start()
+        budget = budget or current_budget()
+        with use_budget(budget):
+            content = await self._create_content_with_research(topic)
+        if budget is not None:
+            logger.info(f"Content run budget usage: {budget.report()}")
+        return content
+
+    async def _create_content_with_research(self, topic: str) -> str:
         try:
             await self.create_agents(topic)
             content_plan = await self.create_content_plan(topic)
@@ -691,25 +743,12 @@ class ContentCreationSystem:
             else:
                 logger.info(f"Using cached research results for topic: {topic}")
 
-            # Generate content for each section
-            completed_sections = []
-            all_sections_content = []
-
-            for section in content_plan.sections:
-                content = await self.create_section_with_research(
-                    section,
-                    content_plan,
-                    research_results,
-                    completed_sections
-                )
-                section.content = content
-                completed_sections.append(section)
-                all_sections_content.append({
-                    "title": section.title,
-                    "content": content,
-                    "key_points": await self._extract_key_points(content)
-                })
-                logger.info(f"Completed section: {section.title}")
+            if self.parallel_sections and getattr(self.api, "stateless", False):
+                all_sections_content = await self.create_sections_parallel(content_plan, research_results)
+            else:
+                if self.parallel_sections:
+                    logger.warning("Parallel section drafting needs a stateless API, writing sections sequentially")
+                all_sections_content = await self.create_sections_sequential(content_plan, research_results)
 
             # Create introduction and conclusion based on all content
             introduction, conclusion = await self.create_introduction_conclusion(
@@ -726,6 +765,172 @@ class ContentCreationSystem:
         except Exception as e:
             logger.error(f"Error in content creation: {str(e)}")
             raise
+
+    async def create_sections_sequential(
+        self,
+        content_plan: ContentPlan,
+        research_results: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Write sections one after another, each with the full content of the earlier ones"""
+        completed_sections = []
+        all_sections_content = []
+
+        for section in content_plan.sections:
+            content = await self.create_section_with_research(
+                section,
+                content_plan,
+                research_results,
+                completed_sections
+            )
+            section.content = content
+            completed_sections.append(section)
+            all_sections_content.append({
+                "title": section.title,
+                "content": content,
+                "key_points": await self._section_key_points(section)
+            })
+            logger.info(f"Completed section: {section.title}")
+        return all_sections_content
+
+    async def create_sections_parallel(
+        self,
+        content_plan: ContentPlan,
+        research_results: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Draft every section concurrently from the outline, then smooth the transitions between them"""
+        # Drafts pass their own system instruction; improvements use the instance one, set once up front
+        self.api.set_system_instruction(self.system_instructions["content_improvement"])
+        contents = await asyncio.gather(*(
+            self.draft_section(section, content_plan, research_results)
+            for section in content_plan.sections
+        ))
+        for section, content in zip(content_plan.sections, contents):
+            section.content = content
+
+        await self.smooth_transitions(content_plan)
+        key_points = await asyncio.gather(*(
+            self._section_key_points(section) for section in content_plan.sections
+        ))
+        return [
+            {"title": section.title, "content": section.content, "key_points": points}
+            for section, points in zip(content_plan.sections, key_points)
+        ]
+
+    async def draft_section(
+        self,
+        section: Section,
+        content_plan: ContentPlan,
+        research_results: Dict[str, Any]
+    ) -> str:
+        """Draft and improve a section knowing only the outline, so that sections can be drafted in parallel"""
+        context = {
+            "topic": content_plan.topic,
+            "target_audience": content_plan.target_audience,
+            "content_goals": content_plan.content_goals,
+            "outline": [
+                {"title": s.title, "description": s.description}
+                for s in content_plan.sections
+            ],
+            "previous_sections": [
+                {"title": s.title, "description": s.description}
+                for s in content_plan.sections if s.index < section.index
+            ],
+            "upcoming_sections": [
+                {"title": s.title, "description": s.description}
+                for s in content_plan.sections if s.index > section.index
+            ]
+        }
+
+        prompt = {
+            "role": "user",
+            "content": f"""Create content for section '{section.title}': {section.description}
+            It is part of the outline below; the other sections are written separately, so
+            cover only this section and do not repeat what the other sections are about.
+            {json.dumps(context, indent=2)}
+            
+            Research Findings:
+            {json.dumps(research_results.get(section.title, {}), indent=2)}"""
+        }
+
+        try:
+            async with self._section_semaphore.get():
+                response = await self.api.generate_content(
+                    json.dumps(prompt),
+                    system_instruction=self.system_instructions["section_creation"]
+                )
+                if not response:
+                    return f"Content for {section.title} could not be generated."
+
+                initial_content = response if isinstance(response, str) else json.dumps(response)
+                content = await self.improve_section_content(
+                    section,
+                    initial_content,
+                    research_results,
+                    content_plan,
+                    context
+                )
+            logger.info(f"Drafted section: {section.title}")
+            return content
+
+        except Exception as e:
+            logger.error(f"Error drafting section content: {str(e)}")
+            return f"Error generating content for {section.title}"
+
+    async def smooth_transitions(self, content_plan: ContentPlan) -> None:
+        """Rewrite the opening paragraph of each section so it follows on from the end of the previous one"""
+        # Only openings change, so every transition depends on unchanged text and all can run at once
+        pairs = [
+            (previous, section)
+            for previous, section in zip(content_plan.sections, content_plan.sections[1:])
+            if previous.content and section.content
+        ]
+        openings = await asyncio.gather(*(
+            self._rewrite_opening(previous, section, content_plan) for previous, section in pairs
+        ))
+        for (_, section), opening in zip(pairs, openings):
+            if opening:
+                paragraphs = section.content.split("\n\n")
+                section.content = "\n\n".join([opening] + paragraphs[1:])
+
+    async def _rewrite_opening(
+        self,
+        previous: Section,
+        section: Section,
+        content_plan: ContentPlan
+    ) -> Optional[str]:
+        """Return a new opening paragraph for a section, or None to keep the current one"""
+        paragraphs = section.content.split("\n\n")
+        if len(paragraphs) < 2:
+            # The opening is the whole section; rewriting it would not be a light touch
+            return None
+        previous_ending = previous.content.split("\n\n")[-1]
+
+        prompt = {
+            "role": "user",
+            "content": f"""Smooth the transition between two consecutive sections of an article on '{content_plan.topic}'.
+
+            End of section '{previous.title}':
+            {previous_ending}
+
+            Opening paragraph of section '{section.title}':
+            {paragraphs[0]}
+
+            Rewrite only the opening paragraph so that it follows naturally from the previous
+            section, keeping its facts, citations and length. Return a JSON object with an
+            'opening_paragraph' field."""
+        }
+        try:
+            async with self._section_semaphore.get():
+                response = await self.api.generate_content(
+                    json.dumps(prompt),
+                    system_instruction=self.system_instructions["content_improvement"]
+                )
+            if isinstance(response, dict):
+                response = response.get("opening_paragraph")
+            return response.strip() if isinstance(response, str) and response.strip() else None
+        except Exception as e:
+            logger.error(f"Error smoothing transition into {section.title}: {str(e)}")
+            return None
     
     
     def generate_markdown_with_citations(
@@ -803,12 +1008,15 @@ async def main():
     try:
         from scribe_ai.utils.text_processing import GeminiAPI
         
-        api = GeminiAPI(use_json=True)
-        research_orchestrator = ResearchOrchestrator(rate_limiter, api)
-        system = ContentCreationSystem(api, research_orchestrator)
-        
-        topic = "The Impact of Artificial Intelligence on Healthcare"
-        markdown_content = await system.create_content_with_research(topic)
+        api = GeminiAPI(use_json=True, stateless=True, cache=ResponseCache("llm_cache"))
+        search_cache = ResponseCache("search_cache")
+        async with ResearchOrchestrator(
+            rate_limiter, api, search_cache=search_cache, checkpoints=CheckpointStore("research_checkpoints")
+        ) as research_orchestrator:
+            system = ContentCreationSystem(api, research_orchestrator, parallel_sections=True)
+            
+            topic = "The Impact of Artificial Intelligence on Healthcare"
+            markdown_content = await system.create_content_with_research(topic)
         
         with open("generated_content.md", "w") as f:
             f.write(markdown_content)
@@ -816,6 +1024,8 @@ async def main():
         print("\nContent generated successfully with research and citations!")
         print("\nPreview:")
         print(markdown_content[:500] + "..." if len(markdown_content) > 500 else markdown_content)
+        logger.info(f"LLM response cache: {api.cache.report()}")
+        logger.info(f"Search result cache: {search_cache.report()}")
 
     except Exception as e:
         logger.error(f"Error in main: {str(e)}")
@@ -3,20 +3,46 @@ import json
 import logging
 import os
 from dotenv import load_dotenv
-from typing import Dict, Any, List, Optional, Set, Tuple
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 from dataclasses import dataclass, fields
 from enum import Enum
 import uuid
+import math
+import re
 from datetime import datetime
 import asyncio
 from scribe_ai.utils.text_processing import GeminiAPI
-from scribe_ai.utils.rate_limiter import RateLimiter
-rate_limiter =RateLimiter(15, 60)
-api = GeminiAPI(use_json=True)
+from scribe_ai.utils.rate_limiter import create_rate_limiter
+from scribe_ai.utils.single_flight import SingleFlight
+from scribe_ai.utils.scheduler import PriorityScheduler, JobDropped
+from scribe_ai.utils.response_cache import ResponseCache
+from scribe_ai.utils.query_utils import normalize_query, deduplicate
+from scribe_ai.utils.url_utils import canonicalize_url
+from scribe_ai.utils.relevance import select_passages, split_passages
+from scribe_ai.utils.budget import ResourceBudget, budget_allowance, budget_exhausted, current_budget, use_budget
+from scribe_ai.utils.checkpoint import CheckpointStore
+from scribe_ai.utils.loop_local import LoopLocal
+rate_limiter =create_rate_limiter(15, 60, name="tavily", adaptive=True)
+# Identical Tavily searches in flight at the same time share one request
+search_flight = SingleFlight()
+api = GeminiAPI(use_json=True, stateless=True)
 load_dotenv()
 
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 
+# How long cached search results stay fresh, by freshness class (seconds)
+SEARCH_FRESHNESS_TTL = {
+    "realtime": 30 * 60,
+    "standard": 24 * 3600,
+    "evergreen": 7 * 24 * 3600,
+}
+# Token Jaccard similarity from which two queries are treated as the same search
+QUERY_SIMILARITY_THRESHOLD = 0.7
+TIME_SENSITIVE_TERMS = {
+    "latest", "today", "current", "currently", "recent", "recently", "news",
+    "now", "this week", "this month", "this year", "price", "prices", "breaking",
+}
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,6 +89,16 @@ class ResearchQuery:
             "context": self.context
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ResearchQuery':
+        return cls(
+            text=data["text"],
+            type=data["type"],
+            priority=data["priority"],
+            agent=AgentRole(data["agent"]),
+            context=data.get("context")
+        )
+
 
 @dataclass
 class ResearchFinding:
@@ -84,6 +120,18 @@ class ResearchFinding:
             "metadata": self.metadata,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ResearchFinding':
+        return cls(
+            query=ResearchQuery.from_dict(data["query"]),
+            content=data["content"],
+            sources=data.get("sources", []),
+            urls=data.get("urls", []),
+            confidence=data.get("confidence", 0.0),
+            agent=AgentRole(data["agent"]),
+            metadata=data.get("metadata")
+        )
+
 
 class Source:
     def __init__(self, url: str, title: str, content: str, author: Optional[str] = None, published_date: Optional[str] = None):
@@ -114,6 +162,22 @@ class Source:
             "used_sections": self.used_sections
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Source':
+        """Rebuild a source from to_dict() output, keeping its id."""
+        source = cls(
+            url=data.get("url", ""),
+            title=data.get("title", "Untitled"),
+            content=data.get("content", ""),
+            author=data.get("author"),
+            published_date=data.get("published_date")
+        )
+        source.id = data.get("id", source.id)
+        source.credibility_score = data.get("credibility_score", 0.0)
+        source.verification_status = data.get("verification_status")
+        source.used_sections = list(data.get("used_sections", []))
+        return source
+
     def to_citation(self) -> str:
         """Generate a citation string for the source."""
         citation = f"[{self.title}] ({self.url})"
@@ -123,6 +187,48 @@ class Source:
             citation += f"({self.published_date})"
         return citation
 
+    def merge(self, other: "Source"):
+        """Fill in details of the same page found through another search result."""
+        if len(other.content or "") > len(self.content or ""):
+            self.content = other.content
+        if not self.title or self.title == 'Untitled':
+            self.title = other.title
+        self.author = self.author or other.author
+        self.published_date = self.published_date or other.published_date
+        self.credibility_score = max(self.credibility_score, other.credibility_score)
+        self.verification_status = self.verification_status or other.verification_status
+        for section in other.used_sections:
+            self.add_used_section(section)
+
+
+class SourceRegistry(dict):
+    """
+    Sources by id, with one entry per page.
+
+    register() looks a source up by its canonical URL, so a page returned by
+    several searches keeps the id it was first given and collects their details.
+    """
+    def __init__(self):
+        super().__init__()
+        self._ids_by_url: Dict[str, str] = {}
+
+    def register(self, source: Source) -> Source:
+        """Add a source, or merge it into the registered source for the same page and return that."""
+        key = canonicalize_url(source.url)
+        existing_id = self._ids_by_url.get(key)
+        if existing_id is not None and existing_id in self:
+            existing = self[existing_id]
+            existing.merge(source)
+            return existing
+        self._ids_by_url[key] = source.id
+        self[source.id] = source
+        return source
+
+    def __delitem__(self, source_id):
+        source = self[source_id]
+        self._ids_by_url.pop(canonicalize_url(source.url), None)
+        super().__delitem__(source_id)
+
 
 class BaseAgent:
     def __init__(self, role: AgentRole, api, ratelimiter=None):
@@ -151,9 +257,38 @@ class BaseAgent:
         return [m for m in self.memory if context.lower() in str(m).lower()]
 
 
+def deduplicate_queries(queries: List[ResearchQuery], seen: Optional[List[str]] = None,
+                        threshold: float = QUERY_SIMILARITY_THRESHOLD) -> List[ResearchQuery]:
+    """Keep the highest-priority query of each group of near-duplicates, skipping texts already searched.
+
+    Queries are only compared with queries for the same agent role: only web queries are
+    searched, so a fact-check paraphrase must not displace the web query it resembles."""
+    kept = set()
+    for role in {query.agent for query in queries}:
+        same_role = [query for query in queries if query.agent == role]
+        kept.update(id(query) for query in deduplicate(
+            same_role, text=lambda q: q.text, priority=lambda q: q.priority,
+            threshold=threshold, seen=seen or ()
+        ))
+    unique = [query for query in queries if id(query) in kept]
+    if len(unique) < len(queries):
+        logger.info(f"Removed {len(queries) - len(unique)} near-duplicate queries")
+    return unique
+
+
+def search_allowance(planned: int) -> int:
+    """Number of planned searches that fit in the current resource budget."""
+    allowed = budget_allowance(planned)
+    budget = current_budget()
+    if budget is not None and budget.remaining_searches() is not None:
+        allowed = min(allowed, budget.remaining_searches())
+    return allowed
+
+
 class QueryAgent(BaseAgent):
-    def __init__(self, api):
+    def __init__(self, api, similarity_threshold: float = QUERY_SIMILARITY_THRESHOLD):
         super().__init__(AgentRole.QUERY_SPECIALIST, api)
+        self.similarity_threshold = similarity_threshold
 
     async def generate_queries(self, content_plan: str) -> List[ResearchQuery]:
         thinking = await self.think(content_plan)
@@ -208,24 +343,70 @@ class QueryAgent(BaseAgent):
 
                 except Exception as e:
                     logger.error(f"Error processing query data: {str(e)}")
-            return research_queries
+            return deduplicate_queries(research_queries, threshold=self.similarity_threshold)
         except Exception as e:
             logger.error(f"Error generating queries: {str(e)}")
             return []
 
 
+def classify_freshness(query: ResearchQuery) -> str:
+    """Pick the freshness class deciding how long search results for a query may be cached."""
+    text = normalize_query(query.text)
+    padded = f" {text} "
+    if any(f" {term} " in padded for term in TIME_SENSITIVE_TERMS) or re.search(r"\b20\d\d\b", text):
+        return "realtime"
+    if query.type == "deep-dive":
+        return "evergreen"
+    return "standard"
+
+
 class WebResearchAgent(BaseAgent):
-    def __init__(self, api, rate_limiter):
+    def __init__(self, api, rate_limiter, connection_limit: int = 20,
+                 search_cache: Optional[ResponseCache] = None,
+                 freshness_ttl: Optional[Dict[str, float]] = None,
+                 payload_token_budget: int = 1500):
         super().__init__(AgentRole.WEB_EXPERT, api, rate_limiter)
         self.orchestrator = None  # Initialize orchestrator reference
+        # Optional persistent cache of Tavily responses, keyed by normalised query
+        self.search_cache = search_cache
+        self.freshness_ttl = {**SEARCH_FRESHNESS_TTL, **(freshness_ttl or {})}
+        # Approximate tokens of search evidence sent to the analysis prompt
+        self.payload_token_budget = payload_token_budget
+        # One keep-alive HTTP session is reused for every search
+        self.connection_limit = connection_limit
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session, creating it on first use or when the event loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            timeout = aiohttp.ClientTimeout(total=60, connect=10, sock_read=45)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Close the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
 
     def set_orchestrator(self, orchestrator):
         self.orchestrator = orchestrator
 
     async def search_web(self, query: ResearchQuery) -> ResearchFinding:
-        tavily_data = await self._search_tavily(query.text)
+        tavily_data = await self._search_tavily(query.text, freshness=classify_freshness(query))
         sources = []
         urls = []  # Track URLs separately
+        results = []  # (source id, search result) pairs for the analysis prompt
 
         if tavily_data and 'results' in tavily_data:
             for result in tavily_data['results']:
@@ -240,9 +421,11 @@ class WebResearchAgent(BaseAgent):
 
                     if source.url and source.content:
                         if hasattr(self, 'orchestrator') and self.orchestrator is not None:
-                            self.orchestrator.sources[source.id] = source
-                            sources.append(source.id)
-                            urls.append(source.url)
+                            source = self.orchestrator.sources.register(source)
+                            results.append((source.id, result))
+                            if source.id not in sources:
+                                sources.append(source.id)
+                                urls.append(source.url)
                         else:
                             logger.warning(
                                 "Orchestrator not properly initialized")
@@ -267,7 +450,7 @@ class WebResearchAgent(BaseAgent):
         prompt = f"""
         Analyze these web search results for the query: {query.text}
 
-        Results: {json.dumps(tavily_data)}
+        Results: {json.dumps(self._shape_payload(query.text, tavily_data, results))}
 
         Provide analysis in the following exact JSON format:
         {{
@@ -326,34 +509,105 @@ class WebResearchAgent(BaseAgent):
             metadata=analysis['metadata']
         )
 
-    async def _search_tavily(self, query: str) -> Dict[str, Any]:
-        async with aiohttp.ClientSession() as session:
-            await self.rate_limiter.wait()
-            url = "https://api.tavily.com/search"
-            params = {
-                "api_key": TAVILY_API_KEY,
-                "query": query,
-                "search_depth": "advanced",
-                'include_image': False,
-                'include_answer': True,
-                'max_results': 5
+    def _shape_payload(self, query: str, tavily_data: Dict[str, Any],
+                       results: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Reduce search results to the passages most relevant to the query, within the token budget."""
+        passages = []
+        owners = []
+        for position, (_, result) in enumerate(results):
+            for passage in split_passages(result.get('raw_content') or result.get('content', '')):
+                passages.append(passage)
+                owners.append(position)
+
+        selected = set(select_passages(query, passages, self.payload_token_budget))
+        compact = []
+        for position, (source_id, result) in enumerate(results):
+            kept = [passage for index, passage in enumerate(passages)
+                    if owners[index] == position and index in selected]
+            if not kept:
+                continue
+            entry = {"id": source_id, "title": result.get('title', 'Untitled'),
+                     "url": result.get('url', ''), "passages": kept}
+            if result.get('published_date'):
+                entry["published_date"] = result['published_date']
+            compact.append(entry)
+
+        payload = {"results": compact}
+        if tavily_data.get('answer'):
+            payload["answer"] = tavily_data['answer']
+        return payload
+
+    async def _search_tavily(self, query: str, freshness: str = "standard") -> Dict[str, Any]:
+        params = {
+            "api_key": TAVILY_API_KEY,
+            "query": query,
+            "search_depth": "advanced",
+            'include_image': False,
+            'include_answer': True,
+            'max_results': 5
 
-            }
-            try:
-                async with session.post(url, json=params) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.error(f"Tavily API error: {response.status}")
-                        return {"error": f"API returned status {response.status}", "results": []}
-            except Exception as e:
-                logger.error(f"Tavily API request failed: {str(e)}")
-                return {"error": str(e), "results": []}
+        }
+        search_key = ResponseCache.make_key(
+            "tavily", normalize_query(query), params["search_depth"], params["max_results"]
+        )
+        if self.search_cache is not None:
+            cached = self.search_cache.get(search_key)
+            if cached is not None:
+                logger.info(f"Serving search results from cache for: {query}")
+                return cached
+        return await search_flight.do(
+            search_key, lambda: self._fetch_tavily(params, search_key, freshness)
+        )
+
+    async def _fetch_tavily(self, params: Dict[str, Any], search_key: str, freshness: str) -> Dict[str, Any]:
+        """Run a Tavily search and cache successful results for their freshness class."""
+        data = await self._post_tavily(params)
+        if self.search_cache is not None and "error" not in data:
+            ttl = self.freshness_ttl.get(freshness, self.freshness_ttl["standard"])
+            self.search_cache.set(search_key, data, ttl=ttl)
+        return data
+
+    async def _post_tavily(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        session = self._get_session()
+        await self.rate_limiter.wait()
+        budget = current_budget()
+        if budget is not None:
+            budget.record_search()
+        url = "https://api.tavily.com/search"
+        try:
+            async with session.post(url, json=params) as response:
+                if response.status == 200:
+                    self.rate_limiter.record_success()
+                    return await response.json()
+                else:
+                    if response.status == 429:
+                        self.rate_limiter.record_throttle()
+                    logger.error(f"Tavily API error: {response.status}")
+                    return {"error": f"API returned status {response.status}", "results": []}
+        except Exception as e:
+            logger.error(f"Tavily API request failed: {str(e)}")
+            return {"error": str(e), "results": []}
 
 
 class FactCheckAgent(BaseAgent):
-    def __init__(self, api):
+    def __init__(self, api, max_concurrency: int = 5):
         super().__init__(AgentRole.FACT_CHECKER, api)
+        self._semaphore = LoopLocal(lambda: asyncio.Semaphore(max_concurrency))
+
+    async def verify_findings(self, findings: List[ResearchFinding]) -> List[Dict[str, Any]]:
+        """Verify findings concurrently. Results keep the input order and a failure only affects its own finding."""
+        results = await asyncio.gather(
+            *(self.verify_information(finding) for finding in findings),
+            return_exceptions=True
+        )
+        verifications = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error verifying finding: {str(result)}")
+                verifications.append(self._create_fallback_verification())
+            else:
+                verifications.append(result)
+        return verifications
 
     async def verify_information(self, finding: ResearchFinding) -> Dict[str, Any]:
         finding_str = (
@@ -382,7 +636,8 @@ class FactCheckAgent(BaseAgent):
         }}
         """
         try:
-            response = await self.api.generate_content(prompt)
+            async with self._semaphore.get():
+                response = await self.api.generate_content(prompt)
             if isinstance(response, dict):
                 result = self._validate_verification_result(response)
             elif isinstance(response, str):
@@ -435,12 +690,137 @@ class FactCheckAgent(BaseAgent):
         }
 
 
+def compact_findings(findings: List[ResearchFinding], max_chars: int = 800) -> List[Dict[str, Any]]:
+    """Reduce findings to the fields a prompt needs, with content cut to max_chars."""
+    compact = []
+    for finding in findings:
+        content = finding.content or ""
+        if len(content) > max_chars:
+            content = content[:max_chars].rsplit(" ", 1)[0] + "..."
+        compact.append({
+            "query": finding.query.text if finding.query else "",
+            "content": content,
+            "sources": finding.sources,
+            "confidence": finding.confidence,
+        })
+    return compact
+
+
 class SynthesisAgent(BaseAgent):
-    def __init__(self, api):
+    def __init__(self, api, batch_size: int = 8, merge_fanin: int = 4, max_concurrency: int = 4):
         super().__init__(AgentRole.SYNTHESIS_EXPERT, api)
+        # Above batch_size findings, synthesis runs as map-reduce over batches of this size
+        self.batch_size = batch_size
+        # Number of partial syntheses merged by one reduce call
+        self.merge_fanin = max(2, merge_fanin)
+        self._semaphore = LoopLocal(lambda: asyncio.Semaphore(max_concurrency))
+
+    async def _summarize_batch(self, findings: List[ResearchFinding], content_plan: str) -> Dict[str, Any]:
+        """Map step: condense a batch of findings into a partial, theme-based synthesis."""
+        prompt = f"""
+        Summarize these research findings for: {content_plan}
+
+        Findings: {json.dumps(compact_findings(findings))}
+
+        Group them into themes and return a JSON object in exactly this structure:
+        {{
+            "themes": [
+                {{
+                    "theme": "short theme name",
+                    "summary": "what the findings say about this theme",
+                    "key_points": ["point1", "point2"],
+                    "sources": ["source_id1", "source_id2"]
+                }}
+            ]
+        }}
+        Only use source ids that appear in the findings.
+        """
+        async with self._semaphore.get():
+            response = await self.api.generate_content(prompt)
+        partial = self._parse_partial(response)
+        if not partial["themes"]:
+            # generate_content returns None instead of raising when the call fails
+            logger.error("Empty summary for findings batch, keeping its findings unsummarized")
+            return self._unsummarized(findings)
+        return partial
+
+    @staticmethod
+    def _unsummarized(findings: List[ResearchFinding]) -> Dict[str, Any]:
+        """Fallback partial synthesis carrying a batch's raw findings as a single theme."""
+        return {"themes": [{"theme": "unsummarized findings",
+                            "summary": " ".join(f["content"] for f in compact_findings(findings, 300)),
+                            "key_points": [],
+                            "sources": sorted({s for f in findings for s in f.sources})}]}
+
+    async def _merge_partials(self, partials: List[Dict[str, Any]], content_plan: str) -> Dict[str, Any]:
+        """Reduce step: merge partial syntheses, combining overlapping themes."""
+        prompt = f"""
+        Merge these partial research syntheses for: {content_plan}
+
+        Partial syntheses: {json.dumps(partials)}
+
+        Combine themes that cover the same subject, keep every distinct key point
+        and the union of their sources. Return a JSON object with the same
+        "themes" structure as the input.
+        """
+        async with self._semaphore.get():
+            response = await self.api.generate_content(prompt)
+        merged = self._parse_partial(response)
+        if not merged["themes"]:
+            # Keep the evidence rather than losing it to a failed merge
+            merged["themes"] = [theme for partial in partials for theme in partial["themes"]]
+        return merged
+
+    @staticmethod
+    def _parse_partial(response: Any) -> Dict[str, Any]:
+        if isinstance(response, str):
+            try:
+                response = json.loads(response)
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parsing error in partial synthesis: {str(e)}")
+                response = {}
+        themes = response.get("themes") if isinstance(response, dict) else None
+        return {"themes": [theme for theme in themes or [] if isinstance(theme, dict)]}
+
+    async def _reduce_findings(self, findings: List[ResearchFinding], content_plan: str) -> Dict[str, Any]:
+        """Summarize findings in parallel batches, then merge the partials level by level until one remains."""
+        batches = [findings[i:i + self.batch_size] for i in range(0, len(findings), self.batch_size)]
+        results = await asyncio.gather(
+            *(self._summarize_batch(batch, content_plan) for batch in batches),
+            return_exceptions=True
+        )
+        partials = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error summarizing findings batch: {str(result)}")
+                result = self._unsummarized(batch)
+            partials.append(result)
+
+        while len(partials) > 1:
+            groups = [partials[i:i + self.merge_fanin] for i in range(0, len(partials), self.merge_fanin)]
+            logger.info(f"Merging {len(partials)} partial syntheses in {len(groups)} groups")
+            merged = iter(await asyncio.gather(
+                *(self._merge_partials(group, content_plan) for group in groups if len(group) > 1),
+                return_exceptions=True
+            ))
+            partials = []
+            for group in groups:
+                if len(group) == 1:
+                    partials.append(group[0])
+                    continue
+                result = next(merged)
+                if isinstance(result, Exception):
+                    logger.error(f"Error merging partial syntheses: {str(result)}")
+                    result = {"themes": [theme for partial in group for theme in partial["themes"]]}
+                partials.append(result)
+        return partials[0] if partials else {"themes": []}
 
     async def synthesize_findings(self, findings: List[ResearchFinding], content_plan: str, ) -> Dict[str, Any]:
         thinking = await self.think(f"Synthesizing {len(findings)} findings  :{content_plan}")
+        if len(findings) > self.batch_size:
+            material = await self._reduce_findings(findings, content_plan)
+        else:
+            material = {"findings": compact_findings(findings)}
         structure = {
             "front_matter": {
                 "title": "",
@@ -508,6 +888,7 @@ Based on this thinking: {thinking}
 Synthesize the following research materials into a comprehensive report:
 content Plan: {content_plan}
 Number of findings: {len(findings)}
+Research material: {json.dumps(material)}
 Focus on :
 1. Integrating findings coherently
 2. Highlighting key insights
@@ -549,6 +930,12 @@ Ensure all JSON fields are properly formatted and escapted.
                 str(e)}"
             return structure
 
+    @staticmethod
+    def is_fallback(synthesis: Dict[str, Any]) -> bool:
+        """Tell whether a synthesis is the error template returned when synthesizing failed."""
+        abstract = synthesis.get("executive_summary", {}).get("abstract", "")
+        return isinstance(abstract, str) and abstract.startswith("Error synthesizing findings")
+
 
 class CriticAgent(BaseAgent):
     def __init__(self, api):
@@ -558,7 +945,7 @@ class CriticAgent(BaseAgent):
         prompt = f"""
         Critically analyze this research:
         Synthesis: {json.dumps(synthesis)}
-        Findings: {json.dumps([f.to_dict() for f in findings])}
+        Findings: {json.dumps(compact_findings(findings, max_chars=400))}
         Evaluate:
         1. Comprehensiveness of coverage
         2. Quality of evidence
@@ -642,6 +1029,10 @@ class CriticAgent(BaseAgent):
             "overall_quality": 5  # Neutral score when unable to properly evaluate
         }
 
+    def is_fallback(self, critique: Dict[str, Any]) -> bool:
+        """Tell whether a critique is the fallback returned when the analysis failed."""
+        return critique == self._create_fallback_critique()
+
 
 class QuestionAnswering:
     """Handles direct question answering with source attribution,"""
@@ -852,28 +1243,74 @@ class ResearchImprover:
         self.orchestrator = orchestrator
         self.improvement_threshold = 8.0
         self.max_iterations = 3
-
-    async def improve_research(self, synthesis: Dict[str, Any], critique: Dict[str, Any], findings: List[ResearchFinding], content_plan: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-        """Iteratively improve research based on critique feedback. Returns improved synthesis and critique."""
+        # Stop once an iteration raises overall_quality by less than this
+        self.min_quality_gain = 0.5
+        # Summary of the last improve_research run: trajectory, stop reason, iterations saved
+        self.last_improvement_report: Dict[str, Any] = {}
+
+    async def improve_research(self, synthesis: Dict[str, Any], critique: Dict[str, Any], findings: List[ResearchFinding], content_plan: str,
+                               unseen_findings: Optional[List[ResearchFinding]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Iteratively improve research based on critique feedback. Returns the best synthesis seen and its critique.
+
+        unseen_findings are findings already in `findings` that the synthesis was not built
+        from, such as those verified after synthesis started; the first iteration treats them
+        as new material. When no iteration runs they only appear in the report's sources.
+
+        The loop ends when the quality target or max_iterations is reached, or
+        when an iteration gains less than min_quality_gain."""
+        unseen = list(unseen_findings or [])
         current_synthesis = synthesis
         current_critique = critique
+        best_synthesis, best_critique = synthesis, critique
+        trajectory = [critique['overall_quality']]
+        stop_reason = "target_reached"
         iteration = 0
         
+        budget = current_budget()
         while (current_critique['overall_quality'] < self.improvement_threshold and iteration < self.max_iterations):
+            if budget is not None and budget.is_low():
+                logger.info("Resource budget low, skipping further improvement iterations")
+                stop_reason = "budget"
+                break
             improvement_plan = await self._create_improvement_plan(current_critique)
             new_findings = await self._conduct_additional_research(
                 improvement_plan, content_plan, findings
             )
             findings.extend(new_findings)
-            current_synthesis = await self._improve_synthesis(
-                current_synthesis, improvement_plan, findings
+            if unseen:
+                new_findings, unseen = unseen + new_findings, []
+            improved = await self._improve_synthesis(
+                current_synthesis, improvement_plan, findings, new_findings
             )
+            if isinstance(improved, dict):
+                current_synthesis = improved
+            else:
+                logger.error("Synthesis improvement returned no usable result, keeping the current synthesis")
             current_critique = await self.orchestrator.agents[AgentRole.CRITIC].critiqe_research(
                 current_synthesis, findings
             )
             iteration += 1
-            
-        return current_synthesis, current_critique
+
+            quality = current_critique['overall_quality']
+            gain = quality - trajectory[-1]
+            trajectory.append(quality)
+            if quality > best_critique['overall_quality']:
+                best_synthesis, best_critique = current_synthesis, current_critique
+            if quality < self.improvement_threshold and gain < self.min_quality_gain:
+                logger.info(f"Improvement converged after {iteration} iterations (gain {gain:+.2f})")
+                stop_reason = "converged"
+                break
+        else:
+            if current_critique['overall_quality'] < self.improvement_threshold:
+                stop_reason = "max_iterations"
+
+        self.last_improvement_report = {
+            "quality_trajectory": trajectory,
+            "iterations": iteration,
+            "iterations_saved": self.max_iterations - iteration,
+            "stop_reason": stop_reason,
+        }
+        return best_synthesis, best_critique
 
     async def _create_improvement_plan(self, critique: Dict[str, Any]) -> Dict[str, Any]:
         """Generate a structured improvement plan based on the critique"""
@@ -979,7 +1416,9 @@ class ResearchImprover:
     async def _conduct_additional_research(self, improvement_plan: Dict[str, Any], content_plan: str, findings: List[ResearchFinding]) -> List[ResearchFinding]:
         """Conduct additional research based on the improvement plan."""
         new_findings = []
-        
+        # Queries close to one already researched would only repeat earlier findings
+        searched = [finding.query.text for finding in findings]
+
         for gap in improvement_plan.get('research_gaps', []):
             queries = []
             for query_text in gap.get('suggested_queries', []):
@@ -991,7 +1430,10 @@ class ResearchImprover:
                     context=f"Filling research gap: {gap.get('topic', 'general improvement')}"
                 )
                 queries.append(query)
-                
+
+            queries = deduplicate_queries(queries, seen=searched)
+            queries = queries[:search_allowance(len(queries))]
+            searched.extend(query.text for query in queries)
             tasks = [
                 self.orchestrator.agents[AgentRole.WEB_EXPERT].search_web(query)
                 for query in queries
@@ -999,19 +1441,85 @@ class ResearchImprover:
             
             try:
                 results = await asyncio.gather(*tasks)
-                for finding in results:
-                    verification = await self.orchestrator.agents[AgentRole.FACT_CHECKER].verify_information(finding)
+                verifications = await self.orchestrator.agents[AgentRole.FACT_CHECKER].verify_findings(results)
+                for finding, verification in zip(results, verifications):
                     if verification['verification_status'] in ['verified', 'partially_verified']:
                         new_findings.append(finding)
             except Exception as e:
                 logger.error(f"Error in additional research: {str(e)}")
                 
         return new_findings    
+    @staticmethod
+    def _match_section(name: str, synthesis: Dict[str, Any]) -> Optional[str]:
+        """Map a section name from the improvement plan, e.g. "Executive Summary", to a synthesis key."""
+        key = re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+        if key in synthesis:
+            return key
+        # Names such as "discussion section" or "findings.case_studies"
+        candidates = [section for section in synthesis if section in key]
+        return max(candidates, key=len) if candidates else None
+
+    async def _improve_section(self, section: str, content: Any, improvements: List[Dict[str, Any]],
+                               improvement_plan: Dict[str, Any],
+                               new_findings: List[ResearchFinding]) -> Any:
+        """Regenerate a single synthesis section, keeping the original if the result does not fit."""
+        prompt = f"""
+        Improve the "{section}" section of a research synthesis.
+
+        Current section: {json.dumps(content)}
+        Issues to address: {json.dumps(improvements)}
+        Narrative gaps: {json.dumps(improvement_plan.get('narrative_gaps', []))}
+        New findings: {json.dumps(compact_findings(new_findings, max_chars=400))}
+
+        Return only the improved section as JSON, with exactly the same structure as the current section.
+        """
+        response = await self.orchestrator.api.generate_content(prompt)
+        improved = json.loads(response) if isinstance(response, str) else response
+        # The model sometimes wraps the answer as {"<section>": ...}
+        if isinstance(improved, dict) and list(improved) == [section] and not (
+                isinstance(content, dict) and list(content) == [section]):
+            improved = improved[section]
+        if type(improved) is not type(content):
+            logger.warning(f"Improved section '{section}' has the wrong structure, keeping the original")
+            return content
+        return improved
+
     async def _improve_synthesis(self, current_synthesis: Dict[str, Any], 
                                improvement_plan: Dict[str, Any],
                                findings: List[ResearchFinding], 
+                               new_findings: Optional[List[ResearchFinding]] = None,
                                ) -> Dict[str, Any]:
-        """Improve synthesis based on improvement plan."""
+        """
+        Improve synthesis based on improvement plan.
+
+        Only the sections named in synthesis_improvements are regenerated, in
+        parallel, and patched into a copy of the synthesis; the rest is kept as
+        is. The whole synthesis is rewritten when no named section matches.
+        """
+        targets: Dict[str, List[Dict[str, Any]]] = {}
+        for improvement in improvement_plan.get('synthesis_improvements', []):
+            if not isinstance(improvement, dict):
+                continue
+            section = self._match_section(improvement.get('section', ''), current_synthesis)
+            if section is not None:
+                targets.setdefault(section, []).append(improvement)
+
+        if targets:
+            logger.info(f"Improving synthesis sections: {', '.join(targets)}")
+            results = await asyncio.gather(
+                *(self._improve_section(section, current_synthesis[section], improvements,
+                                        improvement_plan, new_findings or [])
+                  for section, improvements in targets.items()),
+                return_exceptions=True
+            )
+            improved = dict(current_synthesis)
+            for section, result in zip(targets, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error improving section '{section}': {str(result)}")
+                    continue
+                improved[section] = result
+            return improved
+
         prompt = f"""
         Improve this synthesis based on the improvement plan and additional research:
         
@@ -1028,17 +1536,36 @@ class ResearchImprover:
         Return the improved synthesis maintaining the exact same JSON structure as the input synthesis.
         """
         response = await self.orchestrator.api.generate_content(prompt)
-        return json.loads(response) if isinstance(response, str) else response
+        try:
+            improved = json.loads(response) if isinstance(response, str) else response
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON parsing error in _improve_synthesis: {str(e)}")
+            improved = None
+        # generate_content returns None when the call fails
+        return improved if isinstance(improved, dict) else current_synthesis
 
 class ResearchOrchestrator:
-    def __init__(self, rate_limiter, api):
+    def __init__(self, rate_limiter, api, search_concurrency: int = 4, priority_cutoff: int = 3,
+                 verification_concurrency: int = 5, synthesis_quorum: float = 0.8,
+                 late_search_grace: float = 10.0,
+                 search_cache: Optional[ResponseCache] = None,
+                 checkpoints: Optional[CheckpointStore] = None):
         self.api = api
+        # Stage outputs are saved here so failed runs can be resumed
+        self.checkpoints = checkpoints
+        # Fraction of queries that must yield verified findings before synthesis starts
+        self.synthesis_quorum = synthesis_quorum
+        # Seconds searches still running when synthesis finishes get to complete before being cancelled
+        self.late_search_grace = late_search_grace
         self.rate_limiter = rate_limiter
-        self.sources ={}
+        # Searches run through a priority scheduler so high-priority queries get quota first
+        self.search_concurrency = search_concurrency
+        self.priority_cutoff = priority_cutoff
+        self.sources = SourceRegistry()
         self.agents ={
             AgentRole.QUERY_SPECIALIST: QueryAgent(api),
-            AgentRole.WEB_EXPERT:WebResearchAgent(api, rate_limiter),
-            AgentRole.FACT_CHECKER: FactCheckAgent(api),
+            AgentRole.WEB_EXPERT:WebResearchAgent(api, rate_limiter, search_cache=search_cache),
+            AgentRole.FACT_CHECKER: FactCheckAgent(api, verification_concurrency),
             AgentRole.SYNTHESIS_EXPERT: SynthesisAgent(api),
             AgentRole.CRITIC:CriticAgent(api),
         }
@@ -1052,53 +1579,248 @@ class ResearchOrchestrator:
                 agent.set_orchestrator(self)
     async def answer_question(self, question:str)->Dict[str, Any]:
         return await self.qa_system.answer_question(question)
-    
 
-    async def conduct_research(self, content_plan: str) -> Dict[str, Any]:
-        logger.info(f"Starting research on: {content_plan}")
+    async def close(self):
+        """Release network resources held by the agents."""
+        await self.agents[AgentRole.WEB_EXPERT].close()
 
-        # Find relevant stories
+    async def __aenter__(self):
+        return self
 
-        # Generate queries
-        queries = await self.agents[AgentRole.QUERY_SPECIALIST].generate_queries(content_plan)
+    async def __aexit__(self, exc_type, exc_value, exc_tb):
+        await self.close()
+    
+
+    async def _search_and_verify(self, scheduler: PriorityScheduler, query: ResearchQuery) -> Tuple[Optional[ResearchFinding], Optional[Dict[str, Any]]]:
+        """Search one query and verify its finding as soon as the search completes."""
+        async def search() -> ResearchFinding:
+            # Checked when the search starts, since the budget may run out while it is queued
+            if budget_exhausted():
+                raise JobDropped(f"Dropped search '{query.text}': resource budget exhausted")
+            return await self.agents[AgentRole.WEB_EXPERT].search_web(query)
 
-        # Conduct parallel research
-        findings = []
+        try:
+            finding = await scheduler.run(query.priority, search)
+        except JobDropped as e:
+            logger.info(str(e))
+            return None, None
+        except Exception as e:
+            logger.error(f"Search failed for query '{query.text}': {str(e)}")
+            return None, None
+        verification = await self.agents[AgentRole.FACT_CHECKER].verify_information(finding)
+        return finding, verification
+
+    async def _stream_research(self, scheduler: PriorityScheduler, queries: List[ResearchQuery], content_plan: str,
+                               verified_findings: Optional[List[ResearchFinding]] = None, queries_done: int = 0,
+                               on_result: Optional[Callable[[ResearchFinding, bool], None]] = None,
+                               ) -> Tuple[Dict[str, Any], List[ResearchFinding], List[ResearchFinding]]:
+        """
+        Run search->verify pipelines per query and start synthesis once a quorum of verified findings is in.
 
-        # Create tasks for parallel execution
-        tasks = []
-        for query in sorted(queries, key=lambda x: x.priority, reverse=True):
-            if query.agent == AgentRole.WEB_EXPERT:
-                tasks.append(
-                    self.agents[AgentRole.WEB_EXPERT].search_web(query))
+        Pipelines still running keep going while synthesis runs, and once it completes they get
+        late_search_grace more seconds before the rest are cancelled, so searches already paid
+        for are rarely thrown away. Findings verified after synthesis started are not in the
+        synthesis; they are returned separately for the improvement step. Returns the synthesis,
+        the verified findings it was built from and the late verified findings.
 
-        # Execute tasks in parallel
-        results = await asyncio.gather(*tasks)
+        A resumed run passes the findings verified before (verified_findings) and the number of
+        queries already searched (queries_done). on_result is called with every searched finding
+        and whether it was verified.
+        """
+        pipelines = {asyncio.ensure_future(self._search_and_verify(scheduler, query)) for query in queries}
+        quorum = max(1, math.ceil(self.synthesis_quorum * (len(pipelines) + queries_done)))
+        verified_findings = list(verified_findings or [])
+        late_findings: List[ResearchFinding] = []
+        synthesis_task = None
+        pending = set(pipelines)
+
+        def collect(task: "asyncio.Future[Any]") -> None:
+            finding, verification = task.result()
+            verified = bool(finding) and verification['verification_status'] in ['verified', 'partially_verified']
+            if verified:
+                (verified_findings if synthesis_task is None else late_findings).append(finding)
+            if finding and on_result is not None:
+                on_result(finding, verified)
 
-        # Process results
-        for result in results:
-            if isinstance(result, ResearchFinding):
-                findings.append(result)
-
-        # Verify findings
-        verified_findings = []
-        for finding in findings:
-            verification = await self.agents[AgentRole.FACT_CHECKER].verify_information(finding)
-            if verification['verification_status'] in ['verified', 'partially_verified']:
-                verified_findings.append(finding)
-
-        # Synthesize everything
-        synthesis = await self.agents[AgentRole.SYNTHESIS_EXPERT].synthesize_findings(
-            verified_findings, content_plan
+        try:
+            while pending:
+                waiting_on = pending | ({synthesis_task} if synthesis_task else set())
+                done, _ = await asyncio.wait(waiting_on, return_when=asyncio.FIRST_COMPLETED)
+                for task in done & pending:
+                    pending.discard(task)
+                    collect(task)
+
+                if synthesis_task is None and (len(verified_findings) >= quorum or not pending):
+                    logger.info(f"Starting synthesis with {len(verified_findings)} verified findings, "
+                                f"{len(pending)} searches still running")
+                    synthesis_task = asyncio.ensure_future(
+                        self.agents[AgentRole.SYNTHESIS_EXPERT].synthesize_findings(
+                            list(verified_findings), content_plan
+                        )
+                    )
+                if synthesis_task is not None and synthesis_task.done():
+                    break
+            if pending and self.late_search_grace > 0:
+                done, pending = await asyncio.wait(pending, timeout=self.late_search_grace)
+                for task in done:
+                    collect(task)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.info(f"Cancelled {len(pending)} searches that were still running after synthesis")
+
+        if synthesis_task is None:
+            synthesis_task = asyncio.ensure_future(
+                self.agents[AgentRole.SYNTHESIS_EXPERT].synthesize_findings(list(verified_findings), content_plan)
+            )
+        synthesis = await synthesis_task
+        if late_findings:
+            logger.info(f"{len(late_findings)} findings verified after synthesis started, left for the improvement step")
+        return synthesis, verified_findings, late_findings
+
+    async def conduct_research(self, content_plan: str, time_budget: Optional[float] = None,
+                               budget: Optional[ResourceBudget] = None,
+                               run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Run the full research pipeline. With a time budget (seconds), low-priority searches
+        are dropped when the remaining time or search quota runs short.
+
+        A resource budget, passed in or inherited from the caller's context, limits LLM
+        calls, tokens, searches and time: when it runs low fewer queries are searched
+        and improvement iterations are skipped, and once it is used up no further
+        searches start. Query generation, synthesis and critique still run, so the
+        budget is a soft cap rather than a hard one.
+
+        With a checkpoint store, each stage's output is saved under run_id (a new id
+        when not given); calling again with the same run_id and content plan, or
+        resume(run_id), skips the stages already completed. A stage that fell back
+        after an error is not saved, nor is any stage after it, so the retry redoes
+        it. The checkpoint is deleted once the report is complete."""
+        if budget is not None:
+            # A budget handed to this run starts its clock here; an inherited one is already running
+            budget.start()
+        budget = budget or current_budget()
+        checkpoint = None
+        if self.checkpoints is not None:
+            run_id = run_id or uuid.uuid4().hex
+            logger.info(f"Research run id: {run_id}")
+            checkpoint = self.checkpoints.start(
+                run_id, CheckpointStore.input_hash(content_plan), {"content_plan": content_plan}
+            )
+        with use_budget(budget):
+            return await self._conduct_research(content_plan, time_budget, budget, checkpoint)
+
+    async def resume(self, run_id: str, time_budget: Optional[float] = None,
+                     budget: Optional[ResourceBudget] = None) -> Dict[str, Any]:
+        """Continue a checkpointed research run from its first incomplete stage."""
+        if self.checkpoints is None:
+            raise ValueError("Resuming requires a checkpoint store")
+        checkpoint = self.checkpoints.load(run_id)
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint found for run {run_id}")
+        return await self.conduct_research(
+            checkpoint["inputs"]["content_plan"], time_budget, budget, run_id=run_id
         )
 
-        # Critique research
-        critique = await self.agents[AgentRole.CRITIC].critiqe_research(
-            synthesis, verified_findings,
-        )
-        improved_synthesis, final_critique = await self.improver.improve_research(
-            synthesis, critique, verified_findings,  content_plan
-        )
+    def _save_stage(self, checkpoint: Optional[Dict[str, Any]], stage: str, output: Any) -> None:
+        if checkpoint is not None:
+            self.checkpoints.save_stage(checkpoint, stage, output)
+
+    def _stop_checkpointing(self, checkpoint: Optional[Dict[str, Any]], stage: str) -> None:
+        """Leave a failed stage, and the stages built on it, unsaved so a retry runs them again."""
+        if checkpoint is not None:
+            logger.warning(f"Stage {stage} of run {checkpoint['run_id']} failed, not checkpointing it")
+        return None
+
+    def _findings_state(self, findings: List[ResearchFinding]) -> Dict[str, Any]:
+        """Serialise findings together with the sources they cite."""
+        source_ids = set().union(*[f.sources for f in findings]) if findings else set()
+        return {
+            "findings": [f.to_dict() for f in findings],
+            "sources": [
+                {**self.sources[s].to_dict(), "content": self.sources[s].content}
+                for s in source_ids if s in self.sources
+            ],
+        }
+
+    def _restore_findings(self, state: Dict[str, Any]) -> List[ResearchFinding]:
+        for source_data in state.get("sources", []):
+            source = Source.from_dict(source_data)
+            if source.id not in self.sources:
+                self.sources.register(source)
+        return [ResearchFinding.from_dict(f) for f in state.get("findings", [])]
+
+    async def _conduct_research(self, content_plan: str, time_budget: Optional[float],
+                                budget: Optional[ResourceBudget],
+                                checkpoint: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        stages = checkpoint["stages"] if checkpoint is not None else {}
+        run_id = checkpoint["run_id"] if checkpoint is not None else None
+        logger.info(f"Starting research on: {content_plan}")
+
+        # Find relevant stories
+
+        # Generate queries
+        if "queries" in stages:
+            queries = [ResearchQuery.from_dict(q) for q in stages["queries"]]
+        else:
+            queries = await self.agents[AgentRole.QUERY_SPECIALIST].generate_queries(content_plan)
+            if queries:
+                self._save_stage(checkpoint, "queries", [q.to_dict() for q in queries])
+            else:
+                checkpoint = self._stop_checkpointing(checkpoint, "queries")
+
+        if "research" in stages:
+            research = stages["research"]
+            synthesis = research["synthesis"]
+            restored = self._restore_findings(research)
+            synthesized_count = research.get("synthesized", len(restored))
+            verified_findings, late_findings = restored[:synthesized_count], restored[synthesized_count:]
+        else:
+            synthesis, verified_findings, late_findings = await self._research_queries(
+                queries, content_plan, time_budget, budget, checkpoint
+            )
+            if SynthesisAgent.is_fallback(synthesis):
+                checkpoint = self._stop_checkpointing(checkpoint, "research")
+            else:
+                self._save_stage(checkpoint, "research", {
+                    "synthesis": synthesis,
+                    "synthesized": len(verified_findings),
+                    **self._findings_state(verified_findings + late_findings)
+                })
+
+        # Critique research against the findings the synthesis was built from
+        if "critique" in stages:
+            critique = stages["critique"]
+        else:
+            critique = await self.agents[AgentRole.CRITIC].critiqe_research(
+                synthesis, verified_findings,
+            )
+            if self.agents[AgentRole.CRITIC].is_fallback(critique):
+                checkpoint = self._stop_checkpointing(checkpoint, "critique")
+            else:
+                self._save_stage(checkpoint, "critique", critique)
+
+        if "improvement" in stages:
+            improvement = stages["improvement"]
+            improved_synthesis, final_critique = improvement["synthesis"], improvement["critique"]
+            verified_findings = self._restore_findings(improvement)
+            self.improver.last_improvement_report = improvement["report"]
+        else:
+            verified_findings = verified_findings + late_findings
+            improved_synthesis, final_critique = await self.improver.improve_research(
+                synthesis, critique, verified_findings,  content_plan, unseen_findings=late_findings
+            )
+            if self.agents[AgentRole.CRITIC].is_fallback(final_critique):
+                checkpoint = self._stop_checkpointing(checkpoint, "improvement")
+            else:
+                self._save_stage(checkpoint, "improvement", {
+                    "synthesis": improved_synthesis,
+                    "critique": final_critique,
+                    "report": self.improver.last_improvement_report,
+                    **self._findings_state(verified_findings)
+                })
+        if budget is not None:
+            logger.info(f"Research budget usage: {budget.report()}")
 
         # Prepare final report
         report_data = {
@@ -1109,17 +1831,23 @@ class ResearchOrchestrator:
                 "initial_quality": critique['overall_quality'],
                 "final_quality": final_critique['overall_quality'],
                 "improvements_made": [s for s in final_critique.get('strengths', [])
-                                    if s not in critique.get('strengths', [])]
+                                    if s not in critique.get('strengths', [])],
+                **self.improver.last_improvement_report
             },
             "metadata": {
                 "total_queries": len(queries),
                 "total_findings": len(verified_findings),
-                "quality_score": final_critique['overall_quality']
+                "quality_score": final_critique['overall_quality'],
+                **({"budget": budget.report()} if budget is not None else {}),
+                **({"run_id": run_id} if run_id is not None else {})
             },
             "sources": [self.sources[s].to_dict() for s in set().union(
                 *[f.sources for f in verified_findings]
             ) if s in self.sources]
         }
+        if checkpoint is not None:
+            # Every stage succeeded, so there is nothing left to resume
+            self.checkpoints.delete(run_id)
 
         logger.info(f"Completed research on: {content_plan}")
         markdown_report = ReportFormatter.format_markdown_report(report_data)
@@ -1129,3 +1857,50 @@ class ResearchOrchestrator:
             "markdown_report": markdown_report
         }
 
+    async def _research_queries(self, queries: List[ResearchQuery], content_plan: str,
+                                time_budget: Optional[float], budget: Optional[ResourceBudget],
+                                checkpoint: Optional[Dict[str, Any]]
+                                ) -> Tuple[Dict[str, Any], List[ResearchFinding], List[ResearchFinding]]:
+        """Search, verify and synthesize, checkpointing every searched query so a resumed run skips it.
+
+        Returns the synthesis, the findings it was built from and the findings verified too late for it."""
+        progress = {"searched": [], "findings": [], "sources": []}
+        verified_before: List[ResearchFinding] = []
+        if checkpoint is not None and "search_progress" in checkpoint["stages"]:
+            progress = checkpoint["stages"]["search_progress"]
+            verified_before = self._restore_findings(progress)
+        searched = set(progress["searched"])
+        verified_so_far = list(verified_before)
+
+        def record(finding: ResearchFinding, verified: bool) -> None:
+            progress["searched"].append(finding.query.text)
+            if verified:
+                verified_so_far.append(finding)
+            if checkpoint is not None:
+                progress.update(self._findings_state(verified_so_far))
+                self._save_stage(checkpoint, "search_progress", progress)
+
+        # Stream each query from search into verification, served highest priority first
+        scheduler = PriorityScheduler(
+            max_concurrency=self.search_concurrency,
+            cutoff_priority=self.priority_cutoff,
+            rate_limiter=self.rate_limiter
+        )
+        if budget is not None and budget.remaining_seconds() is not None:
+            remaining = budget.remaining_seconds()
+            time_budget = remaining if time_budget is None else min(time_budget, remaining)
+        scheduler.set_time_budget(time_budget)
+        web_queries = [
+            query for query in sorted(queries, key=lambda x: x.priority, reverse=True)
+            if query.agent == AgentRole.WEB_EXPERT and query.text not in searched
+        ]
+        # Highest-priority queries come first, so trimming keeps the most important ones
+        web_queries = web_queries[:search_allowance(len(web_queries))]
+        synthesis, verified_findings, late_findings = await self._stream_research(
+            scheduler, web_queries, content_plan,
+            verified_findings=verified_before, queries_done=len(searched), on_result=record
+        )
+        if scheduler.dropped:
+            logger.warning(f"Dropped {scheduler.dropped} low-priority queries to stay within the time budget")
+        return synthesis, verified_findings, late_findings
+
@@ -0,0 +1,150 @@
+#budget.py
+
+import logging
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Budget of the run the current task belongs to; copied into every task it spawns
+_current_budget: ContextVar[Optional["ResourceBudget"]] = ContextVar("resource_budget", default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, at about four characters per token."""
+    return math.ceil(len(text or "") / 4)
+
+
+@dataclass
+class ResourceBudget:
+    """
+    Limits on what a single research or content run may consume.
+
+    Every limit is optional. Usage is recorded by GeminiAPI and the web search
+    agent for the budget active in the current context (see use_budget), and the
+    pipeline scales its work down once less than low_watermark of any limit is left.
+    Once a limit is used up, optional work (further searches, section improvement,
+    key point extraction) is skipped; the calls a run needs to produce its result
+    still go out, so the limits can be exceeded by those.
+
+    Attributes:
+        max_llm_calls (Optional[int]): LLM requests sent to the API; cache hits are free
+        max_tokens (Optional[int]): Estimated prompt plus response tokens
+        max_search_calls (Optional[int]): Web search requests
+        max_seconds (Optional[float]): Wall-clock time since the budget was started
+        low_watermark (float): Remaining fraction below which the run degrades
+    """
+    max_llm_calls: Optional[int] = None
+    max_tokens: Optional[int] = None
+    max_search_calls: Optional[int] = None
+    max_seconds: Optional[float] = None
+    low_watermark: float = 0.25
+
+    llm_calls: int = field(default=0, init=False)
+    tokens: int = field(default=0, init=False)
+    search_calls: int = field(default=0, init=False)
+    started_at: float = field(default_factory=time.monotonic, init=False)
+
+    def start(self) -> None:
+        """Restart the wall-clock limit from now."""
+        self.started_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def record_llm_call(self, tokens: int = 0) -> None:
+        self.llm_calls += 1
+        self.tokens += tokens
+
+    def record_search(self) -> None:
+        self.search_calls += 1
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.max_seconds is None:
+            return None
+        return max(0.0, self.max_seconds - self.elapsed)
+
+    def remaining_searches(self) -> Optional[int]:
+        if self.max_search_calls is None:
+            return None
+        return max(0, self.max_search_calls - self.search_calls)
+
+    def remaining_fraction(self) -> float:
+        """Return the share left of the most depleted limit, 1.0 when nothing is limited."""
+        usage = [
+            (self.llm_calls, self.max_llm_calls),
+            (self.tokens, self.max_tokens),
+            (self.search_calls, self.max_search_calls),
+            (self.elapsed, self.max_seconds),
+        ]
+        fractions = [1 - used / limit for used, limit in usage if limit]
+        return max(0.0, min(fractions, default=1.0))
+
+    def is_low(self) -> bool:
+        return self.remaining_fraction() < self.low_watermark
+
+    def is_exhausted(self) -> bool:
+        return self.remaining_fraction() <= 0
+
+    def allowance(self, n: int, minimum: int = 1) -> int:
+        """
+        Scale a planned amount of work to the budget left.
+
+        Returns n while the budget is healthy; below the low watermark the
+        amount shrinks in proportion to what is left, but never below minimum.
+        """
+        if n <= minimum or not self.is_low():
+            return n
+        scaled = math.floor(n * self.remaining_fraction() / self.low_watermark)
+        return max(minimum, min(n, scaled))
+
+    def report(self) -> Dict[str, Any]:
+        """Return usage against each limit."""
+        return {
+            "llm_calls": self.llm_calls,
+            "max_llm_calls": self.max_llm_calls,
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "search_calls": self.search_calls,
+            "max_search_calls": self.max_search_calls,
+            "elapsed_seconds": round(self.elapsed, 2),
+            "max_seconds": self.max_seconds,
+            "remaining_fraction": round(self.remaining_fraction(), 3),
+        }
+
+
+def current_budget() -> Optional[ResourceBudget]:
+    """Return the budget of the run in progress, if any."""
+    return _current_budget.get()
+
+
+@contextmanager
+def use_budget(budget: Optional[ResourceBudget]) -> Iterator[Optional[ResourceBudget]]:
+    """Make a budget current for the enclosed code and the tasks it starts."""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def budget_exhausted() -> bool:
+    """Tell whether the current budget is used up; False when no budget is active."""
+    budget = current_budget()
+    return budget is not None and budget.is_exhausted()
+
+
+def budget_allowance(n: int, minimum: int = 1) -> int:
+    """Scale planned work with the current budget; unchanged when no budget is active."""
+    budget = current_budget()
+    if budget is None:
+        return n
+    allowed = budget.allowance(n, minimum)
+    if allowed < n:
+        logger.info(f"Budget low, reducing planned work from {n} to {allowed}")
+    return allowed
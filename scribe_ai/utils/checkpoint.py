@@ -0,0 +1,101 @@
+#checkpoint.py
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """
+    Stage checkpoints of long-running jobs, one JSON file per run id.
+
+    Each checkpoint records the hash of the run's inputs, so a resumed run can
+    tell whether the saved stages still belong to the same job, and the output
+    of every stage completed so far.
+    """
+
+    def __init__(self, checkpoint_dir: Union[str, Path] = "research_checkpoints") -> None:
+        """
+        Initialize the store.
+
+        Args:
+            checkpoint_dir (Union[str, Path]): Directory holding the checkpoint files
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def input_hash(*inputs: Any) -> str:
+        """Build a stable hash of a run's JSON-serialisable inputs."""
+        payload = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, run_id: str) -> Path:
+        # Run ids come from callers, so keep them to safe file name characters
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in run_id)
+        return self.checkpoint_dir / f"{safe_id}.json"
+
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Return the checkpoint of a run, or None if there is none or it cannot be read."""
+        path = self._path(run_id)
+        if not path.exists():
+            return None
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Error reading checkpoint {run_id}: {str(e)}")
+            return None
+
+    def start(self, run_id: str, input_hash: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Open the checkpoint of a run, starting a new one if none matches the inputs.
+
+        Args:
+            run_id (str): Identifies the run
+            input_hash (str): Hash of the run's inputs, from input_hash
+            inputs (Dict[str, Any]): The inputs themselves, kept so the run can be resumed
+
+        Returns:
+            Dict[str, Any]: The checkpoint, whose "stages" hold the completed stage outputs
+        """
+        checkpoint = self.load(run_id)
+        if checkpoint is not None and checkpoint.get("input_hash") == input_hash:
+            completed = ", ".join(checkpoint.get("stages", {})) or "none"
+            logger.info(f"Resuming run {run_id}; completed stages: {completed}")
+            return checkpoint
+        if checkpoint is not None:
+            logger.warning(f"Inputs of run {run_id} changed, discarding its checkpoint")
+        checkpoint = {"run_id": run_id, "input_hash": input_hash, "inputs": inputs, "stages": {}}
+        self._write(checkpoint)
+        return checkpoint
+
+    def save_stage(self, checkpoint: Dict[str, Any], stage: str, output: Any) -> None:
+        """Record the output of a stage and write the checkpoint to disk."""
+        checkpoint["stages"][stage] = output
+        self._write(checkpoint)
+
+    def _write(self, checkpoint: Dict[str, Any]) -> None:
+        checkpoint["updated_at"] = time.time()
+        path = self._path(checkpoint["run_id"])
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(checkpoint, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            # A failed checkpoint only costs the ability to resume, not the run
+            logger.error(f"Error writing checkpoint {checkpoint['run_id']}: {str(e)}")
+
+    def delete(self, run_id: str) -> None:
+        """Remove the checkpoint of a run."""
+        try:
+            self._path(run_id).unlink()
+        except FileNotFoundError:
+            pass
@@ -1,8 +1,13 @@
 # config.py
+import asyncio
+import hashlib
 import os
+import time
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 from cryptography.fernet import Fernet
 from scribe_ai.utils.api_storage import SecuredAPIStorage
+from scribe_ai.utils.rate_limiter import RateLimiter, create_rate_limiter
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +24,30 @@ ENCRYPTION_KEY = Fernet.generate_key()
 # Initialize SecureAPIStorage
 api_storage = SecuredAPIStorage(ENCRYPTION_KEY)
 
+
+@dataclass
+class KeyState:
+    """Requests-per-minute budget and health of a single API key.
+
+    The budget starts at rpm and adapts to the quota errors the key actually sees.
+    """
+    name: str
+    rpm: int
+    cooldown_until: float = 0.0
+    consecutive_failures: int = 0
+    limiter: RateLimiter = field(init=False)
+
+    def __post_init__(self):
+        self.limiter = create_rate_limiter(self.rpm, 60, name=self.name, adaptive=True)
+
+    def headroom(self):
+        """Return how many more requests the key may send in the current minute."""
+        return self.limiter.available()
+
+    def is_healthy(self, now):
+        return now >= self.cooldown_until
+
+
 class APIManager:
     def __init__(self):
         env_keys = self.load_keys_from_env('GEMINI_API_KEY')
@@ -40,6 +69,11 @@ class APIManager:
         self.google_search_engine_id_keys = self.load_keys_from_env('GOOGLE_SEARCH_ENGINE_ID')
         self.google_api_keys = self.load_keys_from_env('GOOGLE_API_KEY')
 
+        # Per-key budgets used to spread concurrent requests over the key pool
+        self.key_rpm = int(os.getenv('GEMINI_RPM_PER_KEY', 15))
+        self.key_cooldown = float(os.getenv('GEMINI_KEY_COOLDOWN', 60))
+        self.key_states = {}
+
     def load_keys_from_env(self, prefix):
         keys = []
         # Check for a key without a number suffix
@@ -65,6 +99,89 @@ class APIManager:
             logger.info(f"Switched API key from {current_key[:5]}... to {new_key[:5]}...")
         else:
             logger.warning("Unable to switch API key: only one key available")
+
+    def get_key_state(self, key):
+        if key not in self.key_states:
+            # Name the quota by a hash so the key itself never ends up in logs or shared stores
+            name = "gemini:" + hashlib.sha256(key.encode()).hexdigest()[:12]
+            self.key_states[key] = KeyState(name=name, rpm=self.key_rpm)
+        return self.key_states[key]
+
+    def select_key(self):
+        """Pick the healthy key with the most remaining headroom.
+
+        If every key is cooling down after a quota error, the key that recovers
+        first is returned; acquire_key waits for its cooldown before using it.
+        """
+        if not self.api_keys:
+            return None
+        now = time.monotonic()
+        states = [(key, self.get_key_state(key)) for key in self.api_keys]
+        healthy = [(key, state) for key, state in states if state.is_healthy(now)]
+        if healthy:
+            key, _ = min(
+                healthy,
+                key=lambda item: (item[1].limiter.current_wait_time(), -item[1].headroom())
+            )
+        else:
+            key, _ = min(states, key=lambda item: item[1].cooldown_until)
+        return key
+
+    async def acquire_key(self, key=None):
+        """Wait for a request slot within a key's per-minute budget and return the key.
+
+        When no key is given, the key with the most headroom is selected. A key
+        cooling down after a quota error is only returned once its cooldown has
+        ended, so a quota storm does not keep hitting keys that are already failing.
+        """
+        while True:
+            selected = key if key is not None else self.select_key()
+            if selected is None:
+                return None
+            wait = self.get_key_state(selected).cooldown_until - time.monotonic()
+            if wait <= 0:
+                break
+            logger.info(f"Key {selected[:5]}... is cooling down, waiting {wait:.1f}s")
+            # Selection is repeated after the wait in case another key recovered first
+            await asyncio.sleep(wait)
+        await self.get_key_state(selected).limiter.acquire()
+        return selected
+
+    def mark_key_exhausted(self, key):
+        """Take a key out of rotation after a quota error, backing off on repeated failures."""
+        state = self.get_key_state(key)
+        state.consecutive_failures += 1
+        cooldown = self.key_cooldown * 2 ** min(state.consecutive_failures - 1, 4)
+        state.cooldown_until = time.monotonic() + cooldown
+        state.limiter.record_throttle()
+        logger.warning(f"Key {key[:5]}... exhausted, cooling down for {cooldown:.0f}s")
+
+    def mark_key_success(self, key):
+        state = self.get_key_state(key)
+        state.consecutive_failures = 0
+        state.cooldown_until = 0.0
+        state.limiter.record_success()
+
+    def time_until_available(self):
+        """Return seconds until some key is out of cooldown; 0 if one is healthy now."""
+        if not self.api_keys:
+            return 0.0
+        now = time.monotonic()
+        return max(0.0, min(self.get_key_state(key).cooldown_until for key in self.api_keys) - now)
+
+    def key_pool_status(self):
+        """Return headroom and health for every key, with keys masked."""
+        now = time.monotonic()
+        return {
+            key[:5] + '...': {
+                "headroom": self.get_key_state(key).headroom(),
+                "learned_rpm": self.get_key_state(key).limiter.max_calls,
+                "healthy": self.get_key_state(key).is_healthy(now),
+                "consecutive_failures": self.get_key_state(key).consecutive_failures,
+            }
+            for key in self.api_keys
+        }
+
     def add_key(self, new_key):
         if new_key not in self.api_keys:
             self.api_keys.append(new_key)
@@ -73,6 +190,7 @@ class APIManager:
     def remove_key(self, key_to_remove):
         if key_to_remove in self.api_keys:
             self.api_keys.remove(key_to_remove)
+            self.key_states.pop(key_to_remove, None)
             self.save_keys()
 
     def update_key(self, old_key, new_key):
@@ -121,6 +239,7 @@ api_parameters = {
     "temperature": 1.0,
     "top_p": 0.95,
     "top_k": 0.64,
+    "max_concurrent_requests": 8,
 }
 # Function to get the current Google API key
 def get_google_api_key():
@@ -0,0 +1,31 @@
+#loop_local.py
+
+import asyncio
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LoopLocal(Generic[T]):
+    """
+    An asyncio primitive that belongs to the running event loop.
+
+    Locks, semaphores and similar objects bind to the first loop that waits on
+    them, so one created in __init__ breaks when a long-lived owner is used
+    again under a later asyncio.run. LoopLocal builds the object with its
+    factory on first use inside a loop and builds a fresh one whenever the
+    running loop changes.
+    """
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self) -> T:
+        """Return the object for the running loop; must be called inside the loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._value = self._factory()
+            self._loop = loop
+        return self._value
@@ -0,0 +1,82 @@
+#query_utils.py
+
+import logging
+import re
+import unicodedata
+from typing import Callable, FrozenSet, Iterable, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalise a search query so that trivially different spellings compare equal.
+
+    Applies Unicode NFKC normalisation, case folding, punctuation removal and
+    whitespace collapsing, e.g. "  What is  AI?" -> "what is ai".
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = _NON_WORD.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+# Words that carry no topical meaning and would inflate similarity between queries
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in is it of on or the "
+    "this that to was what when where which who why will with about vs versus".split()
+)
+
+
+def query_tokens(text: str) -> FrozenSet[str]:
+    """Return the set of content words of a query, after normalisation."""
+    return frozenset(token for token in normalize_query(text).split() if token not in STOPWORDS)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets; two empty sets count as identical."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def deduplicate(
+    items: Iterable[T],
+    text: Callable[[T], str],
+    priority: Callable[[T], float],
+    threshold: float = 0.7,
+    seen: Iterable[str] = (),
+) -> List[T]:
+    """
+    Collapse near-duplicate items into one representative per cluster.
+
+    Items are visited highest priority first (ties in input order) and an item
+    joins the first kept item whose token Jaccard similarity reaches the
+    threshold, so every cluster is represented by its highest-priority member.
+
+    Args:
+        items (Iterable[T]): Items to deduplicate, e.g. research queries
+        text (Callable[[T], str]): Returns the text compared for an item
+        priority (Callable[[T], float]): Returns the priority of an item
+        threshold (float): Similarity from which two items count as duplicates
+        seen (Iterable[str]): Texts already handled; items close to any of them are dropped
+
+    Returns:
+        List[T]: The kept representatives, in their original order
+    """
+    items = list(items)
+    known = [query_tokens(t) for t in seen]
+    kept = []
+    order = sorted(range(len(items)), key=lambda i: -priority(items[i]))
+    for i in order:
+        tokens = query_tokens(text(items[i]))
+        if any(jaccard(tokens, other) >= threshold for other in known):
+            logger.debug(f"Dropping near-duplicate query: {text(items[i])}")
+            continue
+        known.append(tokens)
+        kept.append(i)
+    return [items[i] for i in sorted(kept)]
@@ -1,22 +1,316 @@
 #rate_limiter.py
 
 import asyncio
+import logging
+import os
+import sqlite3
 import time
+from collections import deque
+
+from .loop_local import LoopLocal
+
+logger = logging.getLogger(__name__)
+
+# Limiters created through create_rate_limiter, by quota name
+_limiters = {}
 
 class RateLimiter:
-    def __init__(self, max_rpm, period):
-        self.max_calls=max_rpm
+    """
+    Async sliding-window rate limiter.
+
+    Allows at most max_rpm units of cost within any window of `period` seconds.
+    Waiters are served in FIFO order, so a heavy request is not starved by a
+    stream of cheap ones.
+
+    In adaptive mode the limit follows AIMD: it grows additively, by about one
+    request per window, while record_success() is reported and is cut
+    multiplicatively on record_throttle(), staying between min_rpm and max_rpm_ceiling.
+    """
+    def __init__(self, max_rpm, period, adaptive=False, min_rpm=1, max_rpm_ceiling=None,
+                 decrease_factor=0.5, name=None):
+        self.max_calls = max_rpm
         self.period = period
-        self.calls=[]
-    
+        self.calls = deque()  # (timestamp, cost), oldest first
+        self._used = 0
+        # Limiters outlive event loops, so the lock is created in the loop that uses it
+        self._lock = LoopLocal(asyncio.Lock)
+        self.waiting = 0
+
+        self.name = name
+        self.adaptive = adaptive
+        self.min_rpm = min_rpm
+        # A static limiter never admits more than max_rpm; only adaptive ones may grow past it
+        self.max_rpm_ceiling = (max_rpm_ceiling or max_rpm * 4) if adaptive else max_rpm
+        self.decrease_factor = decrease_factor
+        self.rate = float(max_rpm)
+        self._last_decrease = 0.0
+
+    def _prune(self, now):
+        while self.calls and now - self.calls[0][0] >= self.period:
+            _, cost = self.calls.popleft()
+            self._used -= cost
+
+    def available(self):
+        """Return the cost that can be acquired right now without waiting."""
+        self._prune(time.monotonic())
+        return max(0, self.max_calls - self._used)
+
+    def current_wait_time(self, n=1):
+        """Return the seconds until a request of cost n could be admitted, ignoring queued waiters."""
+        now = time.monotonic()
+        self._prune(now)
+        limit = self.max_calls
+        if self.adaptive:
+            # A request larger than a reduced adaptive limit is admitted once the window is empty
+            limit = max(limit, n)
+        excess = self._used + n - limit
+        if excess <= 0:
+            return 0.0
+        freed = 0
+        for timestamp, cost in self.calls:
+            freed += cost
+            if freed >= excess:
+                return max(0.0, timestamp + self.period - now)
+        return self.period
+
+    def _check_cost(self, n):
+        """Reject a cost that could never fit: above max_rpm when static, above the ceiling when adaptive."""
+        if n > self.max_rpm_ceiling:
+            raise ValueError(f"Cost {n} exceeds the limit of {self.max_rpm_ceiling} per {self.period}s")
+
+    async def acquire(self, n=1):
+        """Wait until a request of cost n fits in the window, then record it."""
+        self._check_cost(n)
+        self.waiting += 1
+        try:
+            # asyncio.Lock wakes waiters in the order they arrived
+            async with self._lock.get():
+                while True:
+                    sleep_time = self.current_wait_time(n)
+                    if sleep_time <= 0:
+                        break
+                    await asyncio.sleep(sleep_time)
+                self.calls.append((time.monotonic(), n))
+                self._used += n
+        finally:
+            self.waiting -= 1
+
     async def wait(self):
-        now = time.time()
-        self.calls= [call for call in self.calls if now-call<self.period]
-        if len(self.calls)>= self.max_calls:
-            sleep_time=self.period-(now-self.calls[0])
-        self.calls.append(time.time())
+        await self.acquire(1)
+
+    def record_success(self):
+        """Report a request the provider accepted; raises the adaptive limit additively."""
+        if not self.adaptive:
+            return
+        self.rate = min(self.max_rpm_ceiling, self.rate + 1.0 / self.rate)
+        self.max_calls = max(1, int(self.rate))
+
+    def record_throttle(self):
+        """Report a 429 / quota error; cuts the adaptive limit multiplicatively."""
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        # Throttles from requests that were already in flight count as one congestion signal
+        if now - self._last_decrease < self.period / max(self.rate, 1.0):
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rpm, self.rate * self.decrease_factor)
+        self.max_calls = max(1, int(self.rate))
+        logger.warning(f"Rate limit {self.name or ''} reduced to {self.max_calls} per {self.period}s")
+
     async def __aenter__(self):
         await self.wait()
         return self
+
     async def __aexit__(self, exc_type, exc_value, exc_tb):
-        pass
\ No newline at end of file
+        pass
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    Sliding-window rate limiter whose window lives in a shared SQLite database.
+
+    Every process on the host that opens the same database file with the same
+    name draws from one quota. The database runs in WAL mode and each admission
+    check is a short IMMEDIATE transaction, run in an executor, so concurrent
+    processes serialise on the write lock without blocking the event loop.
+    Within a process waiters are still served in FIFO order.
+
+    available() and current_wait_time() are estimates from a snapshot of the
+    shared window. The snapshot is updated by every admission and refreshed in
+    the background with a plain read at most every refresh_interval seconds,
+    so these calls never touch the database on the event loop.
+    """
+    def __init__(self, max_rpm, period, name="default", db_path="rate_limits.db",
+                 refresh_interval=1.0, **kwargs):
+        super().__init__(max_rpm, period, name=name, **kwargs)
+        self.db_path = str(db_path)
+        self.refresh_interval = refresh_interval
+        self._snapshot = []  # (ts, cost) rows of the shared window, as last read
+        self._snapshot_at = None
+        self._refreshing = False
+        self._init_db()
+
+    def _connect(self):
+        # Autocommit mode so transactions are controlled explicitly
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_calls ("
+                "name TEXT NOT NULL, ts REAL NOT NULL, cost INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_rate_limit_calls_name_ts "
+                "ON rate_limit_calls (name, ts)"
+            )
+        finally:
+            conn.close()
+        self._store_snapshot(self._read_window())
+
+    def _wait_from_rows(self, rows, n, now):
+        """Return the seconds until cost n fits in a window holding `rows` (0 if it fits now)."""
+        rows = [(timestamp, cost) for timestamp, cost in rows if now - timestamp < self.period]
+        limit = max(self.max_calls, n) if self.adaptive else self.max_calls
+        excess = sum(cost for _, cost in rows) + n - limit
+        if excess <= 0:
+            return 0.0
+        freed = 0
+        for timestamp, cost in rows:
+            freed += cost
+            if freed >= excess:
+                return max(0.0, timestamp + self.period - now)
+        return self.period
+
+    def _try_acquire(self, n):
+        """
+        Record a call of cost n if it fits in the shared window.
+
+        Returns the wait (0 when admitted) and the window's calls after the attempt.
+        """
+        # Wall-clock time, because the window is shared between processes
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM rate_limit_calls WHERE name = ? AND ts <= ?",
+                (self.name, now - self.period),
+            )
+            rows = conn.execute(
+                "SELECT ts, cost FROM rate_limit_calls WHERE name = ? ORDER BY ts",
+                (self.name,),
+            ).fetchall()
+            sleep_time = self._wait_from_rows(rows, n, now)
+            if sleep_time <= 0:
+                conn.execute(
+                    "INSERT INTO rate_limit_calls (name, ts, cost) VALUES (?, ?, ?)",
+                    (self.name, now, n),
+                )
+                rows.append((now, n))
+            conn.execute("COMMIT")
+            return sleep_time, rows
+        except Exception:
+            # BEGIN itself may have failed, e.g. on a busy timeout, leaving nothing to roll back
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _read_window(self):
+        """Read the calls in the shared window with a plain read, without taking the write lock."""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT ts, cost FROM rate_limit_calls WHERE name = ? AND ts > ? ORDER BY ts",
+                (self.name, time.time() - self.period),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def _store_snapshot(self, rows):
+        self._snapshot = rows
+        self._snapshot_at = time.monotonic()
+
+    def _refresh_snapshot(self):
+        """Start a background read of the shared window when the snapshot is stale."""
+        if self._refreshing or (
+                self._snapshot_at is not None
+                and time.monotonic() - self._snapshot_at < self.refresh_interval):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to block, so read synchronously
+            self._store_snapshot(self._read_window())
+            return
+
+        def done(future):
+            self._refreshing = False
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                logger.error(f"Error reading rate limit window '{self.name}': {future.exception()}")
+                return
+            self._store_snapshot(future.result())
+
+        self._refreshing = True
+        loop.run_in_executor(None, self._read_window).add_done_callback(done)
+
+    def available(self):
+        self._refresh_snapshot()
+        now = time.time()
+        used = sum(cost for timestamp, cost in self._snapshot if now - timestamp < self.period)
+        return max(0, self.max_calls - used)
+
+    def current_wait_time(self, n=1):
+        self._refresh_snapshot()
+        return self._wait_from_rows(self._snapshot, n, time.time())
+
+    async def acquire(self, n=1):
+        self._check_cost(n)
+        loop = asyncio.get_running_loop()
+        self.waiting += 1
+        try:
+            async with self._lock.get():
+                while True:
+                    # SQLite may block on the cross-process write lock, so keep it off the event loop
+                    sleep_time, rows = await loop.run_in_executor(None, self._try_acquire, n)
+                    self._store_snapshot(rows)
+                    if sleep_time <= 0:
+                        return
+                    await asyncio.sleep(sleep_time)
+        finally:
+            self.waiting -= 1
+
+
+def create_rate_limiter(max_rpm, period, name="default", adaptive=False, **kwargs):
+    """
+    Create, or return the existing, rate limiter for a named provider quota.
+
+    When the RATE_LIMIT_DB environment variable points to a database file, the
+    limiter is shared by every process using that file; otherwise it is local to
+    this process.
+    """
+    if name in _limiters:
+        return _limiters[name]
+    db_path = os.getenv("RATE_LIMIT_DB")
+    if db_path:
+        logger.info(f"Using shared rate limiter '{name}' backed by {db_path}")
+        limiter = SQLiteRateLimiter(max_rpm, period, name=name, db_path=db_path, adaptive=adaptive, **kwargs)
+    else:
+        limiter = RateLimiter(max_rpm, period, adaptive=adaptive, name=name, **kwargs)
+    _limiters[name] = limiter
+    return limiter
+
+
+def learned_rates():
+    """Return the current limit of every named limiter, e.g. the rates learned in adaptive mode."""
+    return {
+        name: {"rate": limiter.max_calls, "period": limiter.period, "adaptive": limiter.adaptive}
+        for name, limiter in _limiters.items()
+    }
@@ -0,0 +1,100 @@
+#relevance.py
+
+import re
+from collections import Counter
+from typing import List, Sequence
+
+import numpy as np
+
+from scribe_ai.utils.budget import estimate_tokens
+from scribe_ai.utils.query_utils import STOPWORDS, normalize_query
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a text into normalised content words."""
+    return [token for token in normalize_query(text).split() if token not in STOPWORDS]
+
+
+def split_passages(text: str, max_chars: int = 600) -> List[str]:
+    """
+    Split a document into passages of roughly max_chars characters.
+
+    Paragraphs are kept whole where they fit; longer paragraphs are cut at
+    sentence boundaries and short neighbouring sentences are joined.
+    """
+    passages = []
+    for paragraph in _PARAGRAPH_BREAK.split(text or ""):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            passages.append(paragraph)
+            continue
+        current = ""
+        for sentence in _SENTENCE_END.split(paragraph):
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                passages.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            passages.append(current)
+    return passages
+
+
+def bm25_scores(query: str, passages: Sequence[str], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """
+    Score passages against a query with Okapi BM25.
+
+    Args:
+        query (str): The search query
+        passages (Sequence[str]): Passages to score; they also form the corpus for IDF
+        k1 (float): Term-frequency saturation
+        b (float): Strength of the document length normalisation
+
+    Returns:
+        np.ndarray: One score per passage, higher is more relevant
+    """
+    terms = sorted(set(tokenize(query)))
+    if not passages or not terms:
+        return np.zeros(len(passages))
+
+    counts = [Counter(tokenize(passage)) for passage in passages]
+    # Passage x query-term frequency matrix
+    tf = np.array([[count[term] for term in terms] for count in counts], dtype=float)
+    lengths = np.array([sum(count.values()) for count in counts], dtype=float)
+    avg_length = lengths.mean() or 1.0
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((len(passages) - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * lengths / avg_length)
+    return (idf * tf * (k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+
+def select_passages(query: str, passages: Sequence[str], token_budget: int) -> List[int]:
+    """
+    Pick the most relevant passages that fit within a token budget.
+
+    Passages are taken in order of BM25 score, skipping any that no longer fit.
+    Passages that share no term with the query are only used when none does.
+
+    Returns:
+        List[int]: Indices of the selected passages, most relevant first
+    """
+    scores = bm25_scores(query, passages)
+    order = np.argsort(-scores, kind="stable")
+    if scores.size and scores.max() > 0:
+        order = order[scores[order] > 0]
+
+    selected = []
+    used = 0
+    for index in order.tolist():
+        cost = estimate_tokens(passages[index])
+        if used + cost > token_budget:
+            continue
+        selected.append(index)
+        used += cost
+    return selected
@@ -0,0 +1,199 @@
+#response_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache with per-entry TTL and size-based LRU eviction.
+
+    Every entry is stored as one JSON file named after its key. The access order is
+    kept in memory and mirrored to the file modification times, so the LRU order
+    survives restarts.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = "llm_cache",
+        max_bytes: int = 100 * 1024 * 1024,
+        default_ttl: Optional[float] = 7 * 24 * 3600,
+    ) -> None:
+        """
+        Initialize the cache and index any entries already on disk.
+
+        Args:
+            cache_dir (Union[str, Path]): Directory holding the cache entries
+            max_bytes (int): Total size of entries kept before the least recently used are evicted
+            default_ttl (Optional[float]): Seconds an entry stays valid; None means no expiry
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        # key -> size in bytes, ordered from least to most recently used
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a stable content hash from JSON-serialisable parts."""
+        payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _load_index(self) -> None:
+        """Index existing entries, oldest access first."""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._path(key).open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Dropping unreadable cache entry {key[:12]}: {str(e)}")
+            self._remove(key)
+            return None
+
+    def _remove(self, key: str) -> None:
+        size = self._index.pop(key, 0)
+        self._total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing cache entry {key[:12]}: {str(e)}")
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until the cache fits in max_bytes."""
+        while self._index and self._total_bytes > self.max_bytes:
+            key = next(iter(self._index))
+            logger.debug(f"Evicting cache entry {key[:12]}")
+            self._remove(key)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the cached value for a key, or None on a miss or expired entry.
+
+        Args:
+            key (str): The cache key, usually from make_key
+        """
+        if key not in self._index:
+            self.misses += 1
+            return None
+
+        entry = self._read(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at <= time.time():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        # Mark as most recently used
+        self._index.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+        self.hits += 1
+        self.bytes_saved += self._index[key]
+        return entry.get("value")
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a JSON-serialisable value under a key.
+
+        Args:
+            key (str): The cache key, usually from make_key
+            value (Any): The value to store
+            ttl (Optional[float]): Seconds the entry stays valid. Defaults to default_ttl.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        entry = {
+            "created_at": now,
+            "expires_at": now + ttl if ttl is not None else None,
+            "value": value,
+        }
+        try:
+            data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.error(f"Value for cache entry {key[:12]} is not serialisable: {str(e)}")
+            return
+
+        if len(data) > self.max_bytes:
+            logger.warning(f"Cache entry {key[:12]} larger than the cache, not storing it")
+            return
+
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing cache entry {key[:12]}: {str(e)}")
+            return
+
+        self._total_bytes -= self._index.pop(key, 0)
+        self._index[key] = len(data)
+        self._total_bytes += len(data)
+        self._evict()
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        for key in list(self._index):
+            self._remove(key)
+
+    def report(self) -> Dict[str, Any]:
+        """Return hit-rate and size statistics for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "entries": len(self._index),
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
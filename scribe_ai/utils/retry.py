@@ -0,0 +1,95 @@
+#retry.py
+
+import random
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+_RETRY_IN_PATTERN = re.compile(r"retry in ([0-9.]+)\s*s", re.IGNORECASE)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Bounded retry with exponential backoff and full jitter.
+
+    Attributes:
+        max_attempts (int): Total attempts per call, including the first one
+        base_delay (float): Delay in seconds before the first retry
+        max_delay (float): Upper bound for a single backoff delay
+        multiplier (float): Growth factor of the delay between attempts
+        jitter (bool): Randomise each delay between zero and its backoff value
+        deadline (Optional[float]): Seconds after which a call stops retrying
+    """
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: bool = True
+    deadline: Optional[float] = 120.0
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Return the delay before the next attempt.
+
+        Args:
+            attempt (int): Number of the attempt that just failed, starting at 1
+            retry_after (Optional[float]): Delay requested by the server, if any
+
+        Returns:
+            float: Seconds to wait; never less than the server-requested delay
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def should_retry(self, attempt: int, elapsed: float, delay: float) -> bool:
+        """Return whether another attempt fits within max_attempts and the deadline."""
+        if attempt >= self.max_attempts:
+            return False
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            return False
+        return True
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Extract the server-requested retry delay from an API error, if present.
+
+    Looks at an HTTP Retry-After header, a google.rpc RetryInfo detail and
+    finally a "retry in Ns" hint in the error message.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("Retry-After")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                pass
+
+    for detail in getattr(error, "details", None) or []:
+        if isinstance(detail, dict):
+            # REST transport returns details as JSON, e.g. {"retryDelay": "23s"}
+            value = str(detail.get("retryDelay", "")).rstrip("s")
+            if value:
+                try:
+                    return float(value)
+                except ValueError:
+                    continue
+            continue
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    match = _RETRY_IN_PATTERN.search(str(error))
+    if match:
+        try:
+            return float(match.group(1))
+        except ValueError:
+            pass
+    return None
@@ -0,0 +1,118 @@
+#scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JobDropped(Exception):
+    """Raised for a queued job that was dropped because the run is short on time or quota."""
+    pass
+
+
+class PriorityScheduler:
+    """
+    Run coroutines with bounded concurrency, highest priority first.
+
+    Jobs wait in a priority queue and a free slot always goes to the highest
+    priority waiter, with ties served in submission order. Because only running
+    jobs reach the rate limiter, high-priority work gets quota first.
+
+    With a deadline set, queued jobs below cutoff_priority are dropped once the
+    deadline has passed or the estimated rate-limiter wait no longer fits in the
+    remaining time.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        deadline: Optional[float] = None,
+        cutoff_priority: int = 3,
+        rate_limiter: Optional[Any] = None,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency (int): Number of jobs allowed to run at once
+            deadline (Optional[float]): time.monotonic() value by which the run should finish
+            cutoff_priority (int): Jobs with a lower priority may be dropped when time runs short
+            rate_limiter (Optional[Any]): Limiter whose current wait is used to predict a shortfall
+        """
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.cutoff_priority = cutoff_priority
+        self.rate_limiter = rate_limiter
+        self._queue: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._counter = itertools.count()
+        self._running = 0
+        self.dropped = 0
+
+    def set_time_budget(self, seconds: Optional[float]) -> None:
+        """Set the deadline to `seconds` from now, or clear it with None."""
+        self.deadline = time.monotonic() + seconds if seconds is not None else None
+
+    def _short_on_time(self) -> bool:
+        if self.deadline is None:
+            return False
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        if self.rate_limiter is not None:
+            # Waiters already queued on the limiter are ahead of this job
+            return self.rate_limiter.current_wait_time(1 + self.rate_limiter.waiting) > remaining
+        return False
+
+    def _dispatch(self) -> None:
+        """Start queued jobs while slots are free, dropping low-priority ones when short on time."""
+        while self._queue and self._running < self.max_concurrency:
+            neg_priority, _, waiter = heapq.heappop(self._queue)
+            if waiter.done():
+                continue
+            if -neg_priority < self.cutoff_priority and self._short_on_time():
+                self.dropped += 1
+                waiter.set_exception(JobDropped(f"Dropped priority {-neg_priority} job: out of time budget"))
+                continue
+            self._running += 1
+            waiter.set_result(None)
+
+    async def run(self, priority: int, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Queue a job and run it once it is the highest-priority waiter with a free slot.
+
+        Args:
+            priority (int): Larger values run first
+            func (Callable[[], Awaitable[Any]]): Starts the job
+
+        Returns:
+            Any: The job's result
+
+        Raises:
+            JobDropped: If the job was dropped before it started
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (-priority, next(self._counter), waiter))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # The slot was granted just before the cancellation
+                self._running -= 1
+                self._dispatch()
+            raise
+
+        try:
+            return await func()
+        finally:
+            self._running -= 1
+            self._dispatch()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._queue if not waiter.done())
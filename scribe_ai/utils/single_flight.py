@@ -0,0 +1,57 @@
+#single_flight.py
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one underlying call.
+
+    The first caller for a key starts the call; callers arriving while it is in
+    flight await the same task and receive the same result or exception. The key
+    is forgotten as soon as the call finishes, so later calls go out again.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func for the key, or join the call already in flight for it.
+
+        Args:
+            key (Hashable): Identifies requests that are interchangeable
+            func (Callable[[], Awaitable[Any]]): Starts the underlying call
+
+        Returns:
+            Any: The result of the shared call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Joining in-flight request for {str(key)[:80]}")
+
+        # Shield the shared task so one cancelled caller does not cancel the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        """Return the number of distinct calls currently in flight."""
+        return len(self._inflight)
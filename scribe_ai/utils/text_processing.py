@@ -1,9 +1,17 @@
+import asyncio
 import logging
 import json
+import time
 import google.generativeai as genai
+import google.ai.generativelanguage as glm
 from .config import api_manager, api_parameters
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
+from .retry import RetryPolicy, retry_after_seconds
+from .budget import current_budget, estimate_tokens
+from .loop_local import LoopLocal
 import google.api_core.exceptions
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 import re
 
@@ -36,6 +44,7 @@ def configure_api() -> None:
 configure_api()
 
 class GeminiAPI:
+    MODEL_NAME = "gemini-1.5-flash"
     DEFAULT_SAFETY_SETTINGS = [
         SafetySetting("HARM_CATEGORY_HARASSMENT", "BLOCK_ONLY_HIGH"),
         SafetySetting("HARM_CATEGORY_HATE_SPEECH", "BLOCK_ONLY_HIGH"),
@@ -43,13 +52,27 @@ class GeminiAPI:
         SafetySetting("HARM_CATEGORY_DANGEROUS_CONTENT", "BLOCK_ONLY_HIGH")
     ]
 
-    def __init__(self, use_json: bool = False) -> None:
+    def __init__(self, use_json: bool = False, max_concurrent_requests: Optional[int] = None,
+                 stateless: bool = False, cache: Optional[ResponseCache] = None,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
         """
         Initialize the GeminiAPI instance.
         
         Args:
             use_json (bool): Whether to return responses as JSON
+            max_concurrent_requests (Optional[int]): Maximum number of stateless requests
+                in flight at once. Defaults to api_parameters["max_concurrent_requests"].
+                Chat messages are always sent one at a time.
+            stateless (bool): Send every prompt as an independent request instead of
+                appending it to a shared chat session
+            cache (Optional[ResponseCache]): On-disk response cache for stateless
+                requests. Chat responses depend on the history and are never cached.
+            retry_policy (Optional[RetryPolicy]): Backoff and deadline applied when the
+                API reports exhausted quota. Defaults to RetryPolicy().
         """
+        self.stateless = stateless
+        self.cache = cache
+        self.retry_policy = retry_policy or RetryPolicy()
         self.generation_config = {
             "temperature": api_parameters["temperature"],
             "top_p": api_parameters["top_p"],
@@ -63,22 +86,88 @@ class GeminiAPI:
             for setting in self.DEFAULT_SAFETY_SETTINGS
         ]
         
-        self.model = self._initialize_model()
-        self.chat_session = None
+        # Models are cached per (API key, system instruction) so switching tasks is free
+        self._models: Dict[Tuple[Optional[str], Optional[str]], genai.GenerativeModel] = {}
+        # Async clients per API key, created inside the event loop they are used in
+        self._clients: Dict[str, glm.GenerativeServiceAsyncClient] = {}
+        self._clients_loop: Optional[asyncio.AbstractEventLoop] = None
         self.system_instruction: Optional[str] = None
+        self.model = self._current_model()
+        self.chat_session = None
         self.chat_history: List[Dict[str, str]] = []
         
+        # Bound the number of concurrent stateless requests sent to the API
+        self.max_concurrent_requests = max_concurrent_requests or api_parameters["max_concurrent_requests"]
+        self._request_semaphore = LoopLocal(lambda: asyncio.Semaphore(self.max_concurrent_requests))
+        # Each chat turn builds on the previous one, so chat sends run one at a time
+        self._chat_lock = LoopLocal(asyncio.Lock)
+        
+        # Identical stateless requests in flight at the same time share one API call
+        self._inflight = SingleFlight()
+        
         # Initialize chat session
         self.reset_chat()
 
-    def _initialize_model(self) -> genai.GenerativeModel:
+    def _initialize_model(self, system_instruction: Optional[str] = None) -> genai.GenerativeModel:
         """Initialize and return a new GenerativeModel instance."""
         return genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
+            model_name=self.MODEL_NAME,
             generation_config=self.generation_config,
-            safety_settings=self.safety_settings
+            safety_settings=self.safety_settings,
+            system_instruction=system_instruction
         )
 
+    def _get_model(self, system_instruction: Optional[str], api_key: Optional[str] = None) -> genai.GenerativeModel:
+        """
+        Return the cached model configured with the given system instruction.
+        
+        The instruction is part of the model configuration, so no priming
+        message has to be sent before the model can be used. The model gets
+        its API client from _bind_client right before each request.
+        
+        Args:
+            system_instruction (Optional[str]): The system instruction for the model
+            api_key (Optional[str]): Key the model sends its requests with. Defaults to
+                the globally configured key.
+        """
+        cache_key = (api_key, system_instruction)
+        model = self._models.get(cache_key)
+        if model is None:
+            if system_instruction is not None:
+                self._validate_system_instruction(system_instruction)
+            model = self._initialize_model(system_instruction)
+            self._models[cache_key] = model
+        return model
+
+    def _get_client(self, api_key: str) -> glm.GenerativeServiceAsyncClient:
+        """Return the async client for an API key, creating it on first use or when the event loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._clients_loop is not loop:
+            # gRPC async channels belong to the loop they were created in
+            self._clients = {}
+            self._clients_loop = loop
+        client = self._clients.get(api_key)
+        if client is None:
+            client = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+            self._clients[api_key] = client
+        return client
+
+    def _bind_client(self, model: genai.GenerativeModel, api_key: Optional[str]) -> genai.GenerativeModel:
+        """Point a model at the client for an API key in the running loop; must be called inside the loop."""
+        if api_key is not None:
+            # genai.configure is process-wide, so give the model its own client for this key
+            model._async_client = self._get_client(api_key)
+        return model
+
+    def _current_model(self) -> genai.GenerativeModel:
+        """Return the model for the current system instruction and current API key."""
+        return self._get_model(self.system_instruction, api_manager.get_current_key())
+
+    def _rebuild_models(self) -> None:
+        """Drop cached models after a configuration change and rebuild the current one."""
+        self._models.clear()
+        self.model = self._current_model()
+
     def _validate_system_instruction(self, instruction: str) -> None:
         """
         Validate the system instruction format and content.
@@ -108,6 +197,7 @@ class GeminiAPI:
             self._validate_system_instruction(instruction)
             logger.info(f"Setting system instruction: {instruction[:50]}...")
             self.system_instruction = instruction
+            self.model = self._current_model()
             self.reset_chat()
         except SystemInstructionError as e:
             logger.error(f"Invalid system instruction: {str(e)}")
@@ -117,6 +207,7 @@ class GeminiAPI:
         """Clear the current system instruction and reset the chat."""
         logger.info("Clearing system instruction")
         self.system_instruction = None
+        self.model = self._current_model()
         self.reset_chat()
 
     def get_system_instruction(self) -> Optional[str]:
@@ -124,7 +215,7 @@ class GeminiAPI:
         return self.system_instruction
 
     def switch_and_reconfigure(self) -> None:
-        """Switch to the next API key and reconfigure the model."""
+        """Switch to the next API key and move the chat session over, keeping its history."""
         old_key = api_manager.get_current_key()
         api_manager.switch_key()
         new_key = api_manager.get_current_key()
@@ -132,98 +223,216 @@ class GeminiAPI:
         
         try:
             configure_api()
-            logger.info("Reconfiguring Gemini model with new API key")
-            self.model = self._initialize_model()
-            self.reset_chat()
+            # Models are cached per key, so switching back and forth does not rebuild them
+            self.model = self._current_model()
+            if self.chat_session is not None:
+                self.chat_session = self.model.start_chat(history=self.chat_session.history)
             logger.info("Gemini model reconfigured successfully")
         except APIConfigurationError as e:
             logger.error(f"Failed to reconfigure with new key: {str(e)}")
             raise
 
-    async def generate_content(self, prompt: str) -> Optional[Any]:
+    async def generate_content(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> Optional[Any]:
         """
-        Generate content using the chat session.
+        Generate content using the chat session, or as an independent request in stateless mode.
         
         Args:
             prompt (str): The user prompt
+            system_instruction (Optional[str]): System instruction for this call only
+                (stateless mode). Defaults to the instruction set on the instance.
+            generation_config (Optional[Dict[str, Any]]): Overrides merged into the
+                instance generation config for this call only
             
         Returns:
             Optional[Any]: The generated content, either as text or JSON
         """
-        try:
-            formatted_prompt = f"Human: {prompt}"
-            logger.info(f"Sending prompt to Gemini API: {formatted_prompt[:200]}...")
-            
-            response = self.chat_session.send_message(formatted_prompt)
-            logger.info("Received response from Gemini API")
-            
-            # Store in chat history
-            self.chat_history.append({
-                "role": "user",
-                "content": prompt
-            })
-            self.chat_history.append({
-                "role": "assistant",
-                "content": response.text
-            })
-            
-            if self.generation_config["response_mime_type"] == "application/json":
-                try:
-                    return json.loads(response.text)
-                except json.JSONDecodeError as json_error:
-                    logger.error(f"JSON decode error: {str(json_error)}")
-                    logger.error(f"Raw response: {response.text[:1000]}...")
-                    return response.text
-            return response.text
-            
-        except google.api_core.exceptions.ResourceExhausted:
-            logger.error("API key exhausted. Switching to next key.")
-            self.switch_and_reconfigure()
-            return await self.generate_content(prompt)  # Retry with new key
-        except Exception as e:
-            logger.error(f"An error occurred while generating content: {str(e)}")
-            return None
-
-    def reset_chat(self) -> None:
-        """Reset the chat session and initialize with system instruction if present."""
-        logger.info("Resetting chat session")
-        max_retries = len(api_manager.api_keys)
+        config = {**self.generation_config, **(generation_config or {})}
+        if not self.stateless and system_instruction is not None:
+            logger.warning("Per-call system instructions are only supported in stateless mode")
         
-        for attempt in range(max_retries):
+        policy = self.retry_policy
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                logger.info(f"Attempt {attempt + 1}/{max_retries} to reset chat session")
-                
-                # Initialize new chat session
-                self.chat_session = self.model.start_chat(history=[])
-                self.chat_history = []  # Clear chat history
-                
-                # If system instruction exists, send it with proper formatting
-                if self.system_instruction:
-                    logger.info("Sending system instruction")
-                    formatted_instruction = f"System: {self.system_instruction}"
-                    response = self.chat_session.send_message(formatted_instruction)
-                    
-                    # Store system instruction in history
-                    self.chat_history.append({
-                        "role": "system",
-                        "content": self.system_instruction
-                    })
-                    
-                    logger.info(f"System instruction sent successfully. Response: {response.text[:100]}...")
-                
-                logger.info("Chat session reset successfully")
-                return
-                
+                if self.stateless:
+                    text = await self._generate_stateless(prompt, system_instruction, config)
+                else:
+                    text = await self._send_chat_message(prompt, config)
+                return self._parse_response(text, config)
+            
             except google.api_core.exceptions.ResourceExhausted as e:
-                logger.warning(f"ResourceExhausted error during reset (attempt {attempt + 1}/{max_retries})")
-                if attempt < max_retries - 1:
-                    self.switch_and_reconfigure()
+                delay = self._retry_delay(attempt, e)
+                if not policy.should_retry(attempt, time.monotonic() - start, delay):
+                    logger.error(f"API quota exhausted, giving up after {attempt} attempt(s)")
+                    return None
+                
+                if self.stateless:
+                    # The key was marked exhausted, so the pool picks another one on retry
+                    logger.warning(f"API key exhausted. Retrying with the key pool in {delay:.1f}s")
                 else:
-                    logger.error("All API keys exhausted. Unable to reset chat session.")
-                    raise
+                    logger.warning(f"API key exhausted. Switching to next key and retrying in {delay:.1f}s")
+                    self.switch_and_reconfigure()
+                await asyncio.sleep(delay)
             except Exception as e:
-                logger.error(f"Unexpected error during reset: {str(e)}")
+                logger.error(f"An error occurred while generating content: {str(e)}")
+                return None
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Return how long to wait before retrying after a quota error."""
+        if self.stateless and api_manager.time_until_available() == 0:
+            # Another key still has quota, so fail over immediately
+            return 0.0
+        retry_after = retry_after_seconds(error)
+        if self.stateless:
+            retry_after = max(retry_after or 0.0, api_manager.time_until_available())
+        return self.retry_policy.compute_delay(attempt, retry_after)
+
+    def _parse_response(self, text: str, config: Dict[str, Any]) -> Any:
+        """Decode the response text as JSON when the JSON mime type was requested."""
+        if config["response_mime_type"] == "application/json":
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError as json_error:
+                logger.error(f"JSON decode error: {str(json_error)}")
+                logger.error(f"Raw response: {text[:1000]}...")
+                return text
+        return text
+
+    async def _send_chat_message(self, prompt: str, config: Dict[str, Any]) -> str:
+        """Send a prompt through the shared chat session and record it in the history."""
+        formatted_prompt = f"Human: {prompt}"
+        logger.info(f"Sending prompt to Gemini API: {formatted_prompt[:200]}...")
+        
+        # send_message_async reads the history before awaiting and appends after, so
+        # concurrent sends on one session would build on stale history and drop turns
+        async with self._chat_lock.get():
+            api_key = await api_manager.acquire_key(api_manager.get_current_key())
+            self._bind_client(self.chat_session.model, api_key)
+            try:
+                response = await self.chat_session.send_message_async(
+                    formatted_prompt, generation_config=config
+                )
+            except google.api_core.exceptions.ResourceExhausted:
+                if api_key is not None:
+                    api_manager.get_key_state(api_key).limiter.record_throttle()
+                raise
+            if api_key is not None:
+                api_manager.get_key_state(api_key).limiter.record_success()
+        logger.info("Received response from Gemini API")
+        self._record_usage(formatted_prompt, response)
+        
+        # Store in chat history
+        self.chat_history.append({
+            "role": "user",
+            "content": prompt
+        })
+        self.chat_history.append({
+            "role": "assistant",
+            "content": response.text
+        })
+        return response.text
+
+    async def _generate_stateless(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        config: Dict[str, Any]
+    ) -> str:
+        """
+        Send a prompt as an independent request without any chat history.
+        
+        Responses are served from the cache when one is set, and concurrent
+        identical requests are coalesced into a single API call.
+        """
+        instruction = self.system_instruction if system_instruction is None else system_instruction
+        
+        request_key = ResponseCache.make_key(
+            self.MODEL_NAME, config, self.safety_settings, instruction, prompt
+        )
+        if self.cache is not None:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                logger.info("Serving Gemini response from cache")
+                return cached
+        
+        return await self._inflight.do(
+            request_key,
+            lambda: self._request_stateless(instruction, prompt, config, request_key)
+        )
+
+    async def _request_stateless(
+        self,
+        system_instruction: Optional[str],
+        prompt: str,
+        config: Dict[str, Any],
+        request_key: str
+    ) -> str:
+        """
+        Perform a single stateless API call and store the response in the cache.
+        
+        The request is sent with the key from the pool that has the most headroom.
+        """
+        async with self._request_semaphore.get():
+            api_key = await api_manager.acquire_key()
+            model = self._bind_client(self._get_model(system_instruction, api_key), api_key)
+            logger.info(f"Sending stateless prompt to Gemini API: {prompt[:200]}...")
+            try:
+                response = await model.generate_content_async(prompt, generation_config=config)
+            except google.api_core.exceptions.ResourceExhausted:
+                if api_key is not None:
+                    api_manager.mark_key_exhausted(api_key)
                 raise
+            if api_key is not None:
+                api_manager.mark_key_success(api_key)
+        logger.info("Received response from Gemini API")
+        self._record_usage(prompt, response)
+        
+        text = response.text
+        if self.cache is not None and text:
+            self.cache.set(request_key, text)
+        return text
+
+    @staticmethod
+    def _record_usage(prompt: str, response: Any) -> None:
+        """Charge an API call to the current run's budget, if one is active."""
+        budget = current_budget()
+        if budget is None:
+            return
+        usage = getattr(response, "usage_metadata", None)
+        tokens = getattr(usage, "total_token_count", 0) if usage is not None else 0
+        if not tokens:
+            try:
+                tokens = estimate_tokens(prompt) + estimate_tokens(response.text)
+            except ValueError:
+                # No text, e.g. a blocked response
+                tokens = estimate_tokens(prompt)
+        budget.record_llm_call(tokens)
+
+    def reset_chat(self) -> None:
+        """Reset the chat session. The system instruction is part of the model, so this makes no API calls."""
+        self.chat_history = []  # Clear chat history
+        if self.stateless:
+            # Nothing is carried between stateless requests, so there is no session to start
+            return
+        
+        logger.info("Resetting chat session")
+        self.chat_session = self.model.start_chat(history=[])
+        
+        if self.system_instruction:
+            # Store system instruction in history
+            self.chat_history.append({
+                "role": "system",
+                "content": self.system_instruction
+            })
+        
+        logger.info("Chat session reset successfully")
 
     def update_safety_settings(self, new_settings: List[SafetySetting]) -> None:
         """
@@ -238,7 +447,7 @@ class GeminiAPI:
             for setting in new_settings
         ]
         
-        self.model = self._initialize_model()
+        self._rebuild_models()
         self.reset_chat()
 
     def get_chat_history(self) -> List[Dict[str, str]]:
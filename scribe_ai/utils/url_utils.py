@@ -0,0 +1,53 @@
+#url_utils.py
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the visit and never change the page content
+TRACKING_PARAMS = frozenset({
+    "gclid", "dclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "igshid",
+    "yclid", "_ga", "_gl", "ref_src", "spm",
+})
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce a URL to a canonical form so that links to the same page compare equal.
+
+    Lowercases the scheme and host, drops default ports, a leading "www." and the
+    fragment, removes tracking parameters, sorts the remaining query parameters
+    and strips a trailing slash from the path.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        # Unbalanced IPv6 brackets; such a URL can only match itself
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if ":" in host:
+        # IPv6 literals keep their brackets so the port stays separable
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        # A malformed port is left as written rather than dropping the URL
+        netloc = parts.netloc.lower()
+    else:
+        netloc = host
+        if port is not None and str(port) != DEFAULT_PORTS.get(scheme):
+            netloc = f"{host}:{port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
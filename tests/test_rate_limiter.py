@@ -0,0 +1,160 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from scribe_ai.utils.rate_limiter import RateLimiter, SQLiteRateLimiter
+
+PERIOD = 0.2
+
+
+@pytest.mark.asyncio
+async def test_acquire_within_limit_does_not_wait():
+    limiter = RateLimiter(3, PERIOD)
+    start = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+    assert time.monotonic() - start < PERIOD / 2
+    assert limiter.available() == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_window_to_slide():
+    limiter = RateLimiter(2, PERIOD)
+    start = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+    assert time.monotonic() - start >= PERIOD * 0.9
+
+
+@pytest.mark.asyncio
+async def test_weighted_costs_share_the_window():
+    limiter = RateLimiter(4, PERIOD)
+    await limiter.acquire(3)
+    assert limiter.available() == 1
+    assert limiter.current_wait_time(1) == 0
+    assert limiter.current_wait_time(2) > 0
+
+    start = time.monotonic()
+    await limiter.acquire(2)
+    assert time.monotonic() - start >= PERIOD * 0.9
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_fifo_order():
+    limiter = RateLimiter(3, PERIOD)
+    order = []
+
+    async def request(name, cost):
+        await limiter.acquire(cost)
+        order.append(name)
+
+    await limiter.acquire(2)
+    # The cheap request would fit right away, but must not overtake the heavy one queued before it
+    heavy = asyncio.create_task(request("heavy", 3))
+    await asyncio.sleep(0)
+    cheap = asyncio.create_task(request("cheap", 1))
+    await asyncio.gather(heavy, cheap)
+    assert order == ["heavy", "cheap"]
+
+
+@pytest.mark.asyncio
+async def test_static_limiter_rejects_cost_above_limit():
+    limiter = RateLimiter(2, PERIOD)
+    with pytest.raises(ValueError):
+        await limiter.acquire(3)
+    assert limiter.available() == 2
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_accepts_cost_up_to_ceiling():
+    limiter = RateLimiter(2, PERIOD, adaptive=True, max_rpm_ceiling=4)
+    await limiter.acquire(3)
+    with pytest.raises(ValueError):
+        await limiter.acquire(5)
+
+
+def test_adaptive_limit_backs_off_and_recovers():
+    limiter = RateLimiter(8, PERIOD, adaptive=True)
+    limiter.record_throttle()
+    assert limiter.max_calls == 4
+    for _ in range(20):
+        limiter.record_success()
+    assert limiter.max_calls > 4
+
+
+def test_static_limiter_ignores_feedback():
+    limiter = RateLimiter(8, PERIOD)
+    limiter.record_throttle()
+    limiter.record_success()
+    assert limiter.max_calls == 8
+
+
+@pytest.mark.asyncio
+async def test_sqlite_limiters_share_one_window(tmp_path):
+    db_path = tmp_path / "limits.db"
+    # Two instances on one file stand in for two processes
+    first = SQLiteRateLimiter(2, PERIOD, name="shared", db_path=db_path)
+    second = SQLiteRateLimiter(2, PERIOD, name="shared", db_path=db_path)
+
+    await first.acquire()
+    await first.acquire()
+    start = time.monotonic()
+    await second.acquire()
+    assert time.monotonic() - start >= PERIOD * 0.9
+
+
+@pytest.mark.asyncio
+async def test_sqlite_limiters_with_different_names_are_independent(tmp_path):
+    db_path = tmp_path / "limits.db"
+    first = SQLiteRateLimiter(1, PERIOD, name="a", db_path=db_path)
+    second = SQLiteRateLimiter(1, PERIOD, name="b", db_path=db_path)
+
+    await first.acquire()
+    start = time.monotonic()
+    await second.acquire()
+    assert time.monotonic() - start < PERIOD / 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_limiter_estimates_wait_from_its_snapshot(tmp_path):
+    limiter = SQLiteRateLimiter(2, PERIOD, name="peek", db_path=tmp_path / "limits.db")
+    assert limiter.available() == 2
+    await limiter.acquire(2)
+    assert limiter.available() == 0
+    assert 0 < limiter.current_wait_time() <= PERIOD
+
+
+@pytest.mark.asyncio
+async def test_sqlite_limiter_rejects_cost_above_limit(tmp_path):
+    limiter = SQLiteRateLimiter(2, PERIOD, name="big", db_path=tmp_path / "limits.db")
+    with pytest.raises(ValueError):
+        await limiter.acquire(3)
+
+
+def test_limiter_works_across_event_loops():
+    limiter = RateLimiter(1, 0.05)
+
+    async def contend():
+        await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+    # A lock bound to the first loop would fail once contended in the second
+    asyncio.run(contend())
+    asyncio.run(contend())
+    assert limiter.available() == 0
+
+
+def test_sqlite_limiter_reports_a_busy_database(tmp_path):
+    db_path = tmp_path / "limits.db"
+    limiter = SQLiteRateLimiter(2, PERIOD, name="busy", db_path=db_path)
+    limiter._connect = lambda: sqlite3.connect(db_path, timeout=0.05, isolation_level=None)
+    holder = sqlite3.connect(db_path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        # The lock error surfaces instead of a failed ROLLBACK of a transaction never begun
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            limiter._try_acquire(1)
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()